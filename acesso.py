@@ -0,0 +1,190 @@
+"""Credenciais do painel: senhas com hash e verificação fora da thread do rerun.
+
+`logins.csv` é carregado uma vez num dict indexado pelo usuário. As senhas
+ficam como PBKDF2-SHA256 com sal por usuário (`pbkdf2_sha256$<iterações>$<sal>$<hash>`);
+linhas antigas com a senha em texto (coluna `senha`) são convertidas na
+carga, e `migrar_logins` regrava o arquivo já com os hashes. A verificação
+roda num pool pequeno de threads (o `hashlib` libera o GIL durante o KDF) e
+cada usuário tem um limite de tentativas erradas por janela de tempo.
+
+A coluna opcional `escopo` limita o que o usuário enxerga, no formato
+`dimensão=valor|valor;dimensão=valor` (ex.: `regiao=Sul;canal=app`,
+`loja=12|40`). Vazio = visão consolidada.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+
+# Custo do KDF: suba com o hardware (cada verificação leva ~0,1 s a 200 mil).
+KDF_ITERACOES = 200_000
+ALGORITMO = "pbkdf2_sha256"
+
+MAX_TENTATIVAS = 5        # erros por usuário dentro da janela
+JANELA_TENTATIVAS = 300.0  # segundos
+WORKERS_LOGIN = 4
+LIMPEZA_ERROS = 1024      # usuários com erros antes de varrer os expirados
+
+
+class Credencial(NamedTuple):
+    usuario: str
+    nome: str
+    senha_hash: str
+    escopo: dict[str, list[str]] = {}
+
+
+def ler_escopo(texto: str) -> dict[str, list[str]]:
+    """`"regiao=Sul;loja=12|40"` → `{"regiao": ["Sul"], "loja": ["12", "40"]}`."""
+    escopo = {}
+    for parte in texto.split(";"):
+        if "=" not in parte:
+            continue
+        chave, valores = parte.split("=", 1)
+        valores = [v.strip() for v in valores.split("|") if v.strip()]
+        if valores:
+            escopo[chave.strip()] = valores
+    return escopo
+
+
+class TentativasExcedidas(Exception):
+    """Usuário com erros demais na janela; tente de novo em `segundos`."""
+
+    def __init__(self, segundos: float):
+        super().__init__(f"Muitas tentativas; aguarde {segundos:.0f} s.")
+        self.segundos = segundos
+
+
+def hash_senha(senha: str, sal: bytes | None = None, iteracoes: int = KDF_ITERACOES) -> str:
+    sal = secrets.token_bytes(16) if sal is None else sal
+    chave = hashlib.pbkdf2_hmac("sha256", senha.encode(), sal, iteracoes)
+    return f"{ALGORITMO}${iteracoes}${sal.hex()}${chave.hex()}"
+
+
+def conferir_senha(senha: str, senha_hash: str) -> bool:
+    """Compara em tempo constante; o custo vem do próprio hash guardado."""
+    try:
+        algoritmo, iteracoes, sal, chave = senha_hash.split("$")
+    except ValueError:
+        return False
+    if algoritmo != ALGORITMO:
+        return False
+    calculada = hashlib.pbkdf2_hmac("sha256", senha.encode(), bytes.fromhex(sal), int(iteracoes))
+    return hmac.compare_digest(calculada.hex(), chave)
+
+
+def carregar_credenciais(path: Path) -> dict[str, Credencial]:
+    """Lê `logins.csv` (`usuario`, `nome`, `senha_hash` ou `senha`, e `escopo`)."""
+    df = pd.read_csv(path, dtype=str).fillna("")
+    credenciais = {}
+    for linha in df.to_dict("records"):
+        usuario = linha["usuario"].strip()
+        senha_hash = linha.get("senha_hash", "")
+        if not senha_hash:
+            # Arquivo antigo com senha em texto: só o hash fica em memória.
+            senha_hash = hash_senha(linha.get("senha", ""))
+        credenciais[usuario] = Credencial(
+            usuario, linha["nome"], senha_hash, ler_escopo(linha.get("escopo", ""))
+        )
+    return credenciais
+
+
+def migrar_logins(path: Path, destino: Path | None = None):
+    """Regrava `logins.csv` trocando a coluna `senha` por `senha_hash`."""
+    df = pd.read_csv(path, dtype=str).fillna("")
+    if "senha" in df.columns:
+        hashes = [hash_senha(s) for s in df["senha"]]
+        if "senha_hash" in df.columns:
+            hashes = [h or novo for h, novo in zip(df["senha_hash"], hashes)]
+        df = df.drop(columns="senha").assign(senha_hash=hashes)
+    df.to_csv(destino or path, index=False)
+
+
+class Autenticador:
+    """Verificação de login com pool de threads e limite de tentativas por usuário."""
+
+    def __init__(
+        self,
+        credenciais: dict[str, Credencial],
+        workers: int = WORKERS_LOGIN,
+        max_tentativas: int = MAX_TENTATIVAS,
+        janela: float = JANELA_TENTATIVAS,
+    ):
+        self.credenciais = credenciais
+        self.max_tentativas = max_tentativas
+        self.janela = janela
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="login")
+        self._erros: dict[str, deque] = {}
+        self._andamento: dict[str, int] = {}   # verificações ainda no pool
+        self._limite_limpeza = LIMPEZA_ERROS
+        self._lock = threading.Lock()
+        # Usuário inexistente paga o mesmo KDF, para não vazar quem existe.
+        self._hash_vazio = hash_senha(secrets.token_hex(8))
+
+    def _expirar(self, usuario: str, agora: float) -> deque | None:
+        """Descarta os erros fora da janela (e o usuário, se não sobrar nenhum)."""
+        erros = self._erros.get(usuario)
+        if erros is None:
+            return None
+        while erros and agora - erros[0] > self.janela:
+            erros.popleft()
+        if not erros:
+            del self._erros[usuario]
+            return None
+        return erros
+
+    def _limpar(self, agora: float):
+        # Nomes inventados também contam erros (senão o bloqueio revelaria
+        # quem existe); a varredura amortizada impede o dict de só crescer.
+        if len(self._erros) < self._limite_limpeza:
+            return
+        for usuario in list(self._erros):
+            self._expirar(usuario, agora)
+        self._limite_limpeza = max(LIMPEZA_ERROS, 2 * len(self._erros))
+
+    def _reservar(self, usuario: str, agora: float):
+        """Conta a tentativa antes do KDF; levanta `TentativasExcedidas` se bloqueado.
+
+        Tentativas em andamento entram na conta, então várias sessões
+        disparadas ao mesmo tempo não passam juntas pelo limite.
+        """
+        with self._lock:
+            erros = self._expirar(usuario, agora) or ()
+            andamento = self._andamento.get(usuario, 0)
+            if len(erros) + andamento >= self.max_tentativas:
+                inicio = erros[0] if erros else agora
+                raise TentativasExcedidas(max(self.janela - (agora - inicio), 1.0))
+            self._andamento[usuario] = andamento + 1
+
+    def _liberar(self, usuario: str, ok: bool, agora: float):
+        with self._lock:
+            restantes = self._andamento.pop(usuario) - 1
+            if restantes:
+                self._andamento[usuario] = restantes
+            if ok:
+                self._erros.pop(usuario, None)
+            else:
+                self._erros.setdefault(usuario, deque()).append(agora)
+                self._limpar(agora)
+
+    def autenticar(self, usuario: str, senha: str) -> tuple[bool, str | None]:
+        """(ok, nome). Levanta `TentativasExcedidas` se o usuário estiver bloqueado."""
+        self._reservar(usuario, time.monotonic())
+        ok = False
+        try:
+            cred = self.credenciais.get(usuario)
+            alvo = cred.senha_hash if cred is not None else self._hash_vazio
+            ok = self._pool.submit(conferir_senha, senha, alvo).result() and cred is not None
+        finally:
+            self._liberar(usuario, ok, time.monotonic())
+        if not ok:
+            return False, None
+        return True, cred.nome
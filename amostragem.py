@@ -0,0 +1,82 @@
+"""Redução de pontos das séries enviadas aos gráficos.
+
+Com slots de 1 ou 5 minutos cada curva tem até 1440 pontos, e o painel
+desenha várias delas. Os números (grid, resumo, tabelas) continuam com a
+resolução cheia; só o que vai para o Plotly passa por aqui. Linhas usam
+Largest-Triangle-Three-Buckets (LTTB), que preserva picos e vales; mapas de
+calor usam a média de cada bloco de colunas.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+# Pontos por gráfico: da ordem da largura, em pixels, de um gráfico do painel.
+PONTOS_GRAFICO = 480
+
+
+def lttb(y, n: int = PONTOS_GRAFICO) -> np.ndarray:
+    """Índices dos `n` pontos escolhidos por LTTB na série `y`.
+
+    O primeiro e o último ponto são sempre mantidos. Em cada balde fica o
+    ponto que forma o maior triângulo com o ponto escolhido no balde
+    anterior e a média do balde seguinte. NaN conta como zero na escolha.
+    """
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    m = len(y)
+    if n >= m or n < 3:
+        return np.arange(m)
+
+    x = np.arange(m, dtype=float)
+    bordas = np.linspace(1, m - 1, n - 1).astype(int)
+    escolhidos = np.empty(n, dtype=int)
+    escolhidos[0], escolhidos[-1] = 0, m - 1
+
+    a = 0
+    for i in range(n - 2):
+        ini, fim = bordas[i], bordas[i + 1]
+        if i + 2 < len(bordas):
+            prox = slice(bordas[i + 1], bordas[i + 2])
+            media_x, media_y = x[prox].mean(), y[prox].mean()
+        else:
+            media_x, media_y = x[-1], y[-1]
+        area = np.abs(
+            (x[a] - media_x) * (y[ini:fim] - y[a])
+            - (x[a] - x[ini:fim]) * (media_y - y[a])
+        )
+        a = ini + int(np.argmax(area))
+        escolhidos[i + 1] = a
+    return escolhidos
+
+
+def indices_series(matriz, n: int = PONTOS_GRAFICO) -> np.ndarray:
+    """Índices comuns a várias séries (colunas de `matriz`), até ~`n` no total.
+
+    Cada série escolhe `n / k` pontos por LTTB e o gráfico usa a união, para
+    que todas as curvas continuem com o mesmo eixo x.
+    """
+    matriz = np.asarray(matriz, dtype=float)
+    if matriz.ndim == 1:
+        matriz = matriz[:, None]
+    m, k = matriz.shape
+    if m <= n:
+        return np.arange(m)
+    por_serie = max(n // max(k, 1), 3)
+    return np.unique(np.concatenate([lttb(matriz[:, j], por_serie) for j in range(k)]))
+
+
+def reduzir_colunas(matriz, n: int = PONTOS_GRAFICO) -> tuple[np.ndarray, np.ndarray]:
+    """Média de blocos de colunas consecutivas, para no máximo `n` colunas.
+
+    Devolve a matriz reduzida e o índice da primeira coluna de cada bloco
+    (para os rótulos do eixo x).
+    """
+    matriz = np.asarray(matriz, dtype=float)
+    m = matriz.shape[1]
+    if m <= n:
+        return matriz, np.arange(m)
+    inicio = np.linspace(0, m, n, endpoint=False).astype(int)
+    with np.errstate(invalid="ignore"):
+        soma = np.add.reduceat(np.nan_to_num(matriz), inicio, axis=1)
+        validos = np.add.reduceat(~np.isnan(matriz), inicio, axis=1)
+        media = np.where(validos > 0, soma / np.maximum(validos, 1), np.nan)
+    return media, inicio
@@ -4,7 +4,20 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
+from functools import lru_cache
 import html
+import threading
+import uuid
+
+import acesso
+import amostragem as amo
+import backtest as bt
+import cenarios as cen
+import dados
+import projecao as projecao_mod
+import historico as hist
+import linha_tempo as lt
+from metricas import METRICAS
 
 # =========================================================
 # CONFIG GERAL
@@ -19,6 +32,20 @@ DATA_DIR = Path("data")
 GRID_PATH = DATA_DIR / "saida_grid.csv"
 RESUMO_PATH = DATA_DIR / "saida_resumo.csv"
 LOGINS_PATH = DATA_DIR / "logins.csv"
+PEDIDOS_PATH = DATA_DIR / "pedidos.csv"
+FLUXO_PATH = DATA_DIR / "pedidos_fluxo.jsonl"  # log só de acréscimo (opcional)
+METAS_PATH = DATA_DIR / "metas.csv"
+HISTORICO_DIR = DATA_DIR / "historico"
+LINHA_TEMPO_DIR = DATA_DIR / "linha_tempo"  # resumo de cada slot do dia (replay)
+
+METRICAS_PATH = DATA_DIR / "metricas.prom"  # métricas no formato do Prometheus
+ADMINS = {"admin"}      # usuários que veem a aba de desempenho
+
+REFRESH_SEGUNDOS = 5.0  # intervalo de checagem dos arquivos em data/
+JANELA_CENARIOS = 56    # dias históricos (um cenário cada) na faixa de fechamento
+GRANULARIDADES = (15, 5, 1)  # minutos por slot oferecidos no modo pedidos
+GRID_FLOAT32 = False    # grid do CSV em float32: metade da memória por dia
+KIOSK_INTERVALOS = (15, 30, 60, 120)  # segundos entre conferências no modo TV
 
 PRIMARY = "#00E676"   # verde principal
 DANGER  = "#FF1744"   # vermelho
@@ -132,44 +159,329 @@ def inject_global_css():
 # =========================================================
 # HELPERS: LOADS & AUTENTICAÇÃO
 # =========================================================
-@st.cache_data
-def load_logins(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, dtype=str)
-    df = df.fillna("")
-    return df
+@METRICAS.cache("get_autenticador", st.cache_resource(max_entries=2))
+def get_autenticador(path: Path, assinatura: tuple | None) -> acesso.Autenticador:
+    # Um por processo e por versão do arquivo (mtime/tamanho): credenciais num
+    # dict por usuário, verificação no pool de threads do autenticador.
+    return acesso.Autenticador(acesso.carregar_credenciais(path))
+
+
+@METRICAS.cronometrar("login")
+def authenticate(username: str, password: str, autenticador: acesso.Autenticador):
+    return autenticador.autenticar(username, password)
+
+
+def get_historico(
+    slot_minutos: int = projecao_mod.SLOT_MINUTOS,
+) -> hist.HistoricoVendas | None:
+    if not HISTORICO_DIR.exists():
+        return None
+    return hist.HistoricoVendas(HISTORICO_DIR, slot_minutos)
+
+
+@METRICAS.cache("load_curva_historica", st.cache_data)
+def load_curva_historica(
+    raiz: Path,
+    data: str,
+    filtro: tuple = (),
+    slot_minutos: int = projecao_mod.SLOT_MINUTOS,
+) -> np.ndarray:
+    # Partições de dias passados não mudam: a curva fica em cache por data e filtro.
+    return hist.HistoricoVendas(raiz, slot_minutos).curva(data, dict(filtro))
+
+
+@METRICAS.cache("load_cenarios", st.cache_data(max_entries=32))
+def load_cenarios(
+    versao: str,
+    filtro: tuple,
+    data_ref: str,
+    venda_atual: float,
+    slot_atual: int,
+    meta_dia: float,
+    slot_minutos: int = projecao_mod.SLOT_MINUTOS,
+) -> dict | None:
+    # Projeta com a curva de cada um dos últimos dias do histórico; uma vez
+    # por versão dos dados e recorte. Sem histórico, não há faixa a mostrar.
+    historico = get_historico(slot_minutos)
+    if historico is None:
+        return None
+    datas = historico.dias_anteriores(data_ref, JANELA_CENARIOS)
+    if len(datas) == 0:
+        return None
+    curvas = historico.matriz(datas, dict(filtro))
+    try:
+        return cen.simular_fechamento(curvas, venda_atual, slot_atual, meta_dia)
+    except ValueError:
+        return None
+
+
+@METRICAS.cache("load_backtest", st.cache_data(max_entries=8))
+def load_backtest(
+    raiz: Path,
+    datas: tuple,
+    filtro: tuple = (),
+    slot_minutos: int = projecao_mod.SLOT_MINUTOS,
+) -> dict:
+    # Dias passados não mudam: o backtest fica em cache pelas datas e recorte.
+    curvas = hist.HistoricoVendas(raiz, slot_minutos).matriz(list(datas), dict(filtro))
+    resultado = bt.projecoes_historicas(curvas, pd.DatetimeIndex(datas))
+    slots = projecao_mod.rotulos_slot(slot_minutos)[: curvas.shape[1]]
+    return {
+        "datas": list(datas),
+        "slots": slots,
+        "erro": resultado["erro"],
+        "tabela": bt.erro_por_slot(resultado["erro"], slots),
+    }
+
+
+@METRICAS.cache("load_modelos", st.cache_data(max_entries=32))
+def load_modelos(
+    versao: str,
+    filtro: tuple,
+    data_ref: str,
+    _grid: pd.DataFrame,
+    _resumo: dict,
+    slot_minutos: int = projecao_mod.SLOT_MINUTOS,
+) -> pd.DataFrame:
+    # Todos os modelos saem da mesma base acumulada, uma vez por versão e recorte.
+    curvas_hist = datas = None
+    historico = get_historico(slot_minutos)
+    if historico is not None:
+        datas = historico.dias_anteriores(data_ref, projecao_mod.JANELA_RECENCIA_DIAS)
+        if len(datas):
+            curvas_hist = historico.matriz(datas, dict(filtro))
+    base = projecao_mod.BaseProjecao.de_grid(_grid, _resumo, curvas_hist, datas)
+    return projecao_mod.projetar_modelos(base).assign(SLOT=_grid["SLOT"].to_numpy())
+
+
+@METRICAS.cache("load_previsao", st.cache_data(max_entries=32))
+def load_previsao(
+    versao: str,
+    filtro: tuple,
+    data_ref: str,
+    venda_atual: float,
+    slot_atual: int,
+    projecao_dia: float,
+    _frac_dia: np.ndarray | None = None,
+    slot_minutos: int = projecao_mod.SLOT_MINUTOS,
+) -> pd.DataFrame | None:
+    # Resto do dia previsto uma vez por versão (dados + modelo) e recorte.
+    # Sem a curva do dia inteiro no snapshot (modo CSV), ela vem do histórico.
+    frac_dia = _frac_dia
+    if frac_dia is None:
+        historico = get_historico(slot_minutos)
+        if historico is None:
+            return None
+        frac_dia = historico.referencias(data_ref, dict(filtro))["frac_hist"]
+    if slot_atual >= len(frac_dia) - 1 or not np.any(frac_dia > 0):
+        return None
+    return projecao_mod.prever_restante(
+        venda_atual, slot_atual, projecao_dia, frac_dia, 1440 // len(frac_dia)
+    )
+
+
+def aplicar_modelo(resumo: dict, modelos: pd.DataFrame, chave: str) -> dict:
+    """Resumo com a projeção (e o gap) do modelo escolhido no último slot."""
+    if chave == "frac_hist" or chave not in modelos.columns:
+        return resumo
+    projecao = float(modelos[chave].iloc[-1])
+    return {
+        **resumo,
+        "projecao_dia": projecao,
+        "desvio_projecao": projecao - float(resumo["meta_dia"]),
+        "modelo_projecao": chave,
+    }
+
+
+@METRICAS.cache("get_atualizador", st.cache_resource)
+def get_atualizador(
+    grid_path: Path,
+    resumo_path: Path,
+    pedidos_path: Path | None = None,
+    metas_path: Path | None = None,
+    slot_minutos: int = projecao_mod.SLOT_MINUTOS,
+) -> dados.AtualizadorDados:
+    # Um atualizador por granularidade: cada uma tem seu grid e suas versões.
+    carregador = dados.CarregadorDados(
+        grid_path,
+        resumo_path,
+        pedidos_path,
+        metas_path,
+        historico=get_historico(slot_minutos),
+        slot_minutos=slot_minutos,
+        compacto=GRID_FLOAT32,
+        fluxo_path=FLUXO_PATH,
+    )
+    return dados.AtualizadorDados(
+        carregador,
+        intervalo=REFRESH_SEGUNDOS,
+        linha_tempo=lt.LinhaTempo(LINHA_TEMPO_DIR),
+    )
+
+
+@METRICAS.cronometrar()
+def load_dados(
+    grid_path: Path,
+    resumo_path: Path,
+    pedidos_path: Path | None = None,
+    metas_path: Path | None = None,
+    filtro: dict | None = None,
+    slot_minutos: int = projecao_mod.SLOT_MINUTOS,
+) -> dados.SnapshotDados:
+    # Um único atualizador por processo confere mtime/tamanho dos arquivos em
+    # segundo plano e só relê o que mudou. Com `data/pedidos.csv` presente,
+    # grid e resumo são calculados pelo motor de projeção em vez de lidos dos
+    # CSVs exportados. Cada sessão apenas pega o snapshot já publicado; recortes
+    # por canal/região/loja são calculados uma vez por versão e compartilhados.
+    atualizador = get_atualizador(
+        grid_path, resumo_path, pedidos_path, metas_path, slot_minutos
+    )
+    return atualizador.filtrado(filtro)
+
+
+# =========================================================
+# HELPERS: FILTRO DE CANAL / REGIÃO / LOJA
+# =========================================================
+ROTULOS_DIMENSAO = {"canal": "Canal", "regiao": "Região", "loja": "Loja"}
+
+
+def valores_do_escopo(
+    dimensoes: dict[str, list], escopo: dict[str, list[str]]
+) -> dict[str, list] | None:
+    """Valores de cada dimensão liberados pelo escopo do usuário.
+
+    Devolve None quando o escopo não casa com os dados (dimensão ausente,
+    como no grid exportado em CSV, ou nenhum valor presente): nesse caso não
+    há recorte a mostrar, e a visão consolidada não pode vazar.
+    """
+    if not escopo:
+        return {}
+    if any(chave not in dimensoes for chave in escopo):
+        return None
+    liberados = {
+        chave: [v for v in dimensoes[chave] if str(v) in set(valores)]
+        for chave, valores in escopo.items()
+    }
+    return liberados if all(liberados.values()) else None
+
+
+def seletor_filtro(dimensoes: dict[str, list], escopo: dict[str, list] | None = None) -> dict:
+    """Filtros na barra lateral; lista vazia = todos os valores da dimensão.
+
+    Com `escopo`, as opções de cada dimensão ficam limitadas aos valores
+    liberados e o recorte nunca sai deles.
+    """
+    escopo = escopo or {}
+    if not dimensoes:
+        return dict(escopo)
+    dimensoes = {**dimensoes, **escopo}
+    filtro = {}
+    with st.sidebar:
+        st.markdown("### 🔎 Filtros")
+        for chave, valores in dimensoes.items():
+            filtro[chave] = st.multiselect(
+                ROTULOS_DIMENSAO.get(chave, chave),
+                options=valores,
+                key=f"filtro_{chave}",
+            )
+    return {**escopo, **{k: v for k, v in filtro.items() if v}}
+
+
+def descricao_filtro(filtro: dict) -> str:
+    """Rótulo do recorte, ex.: "App • Sul • Loja 12, 40"."""
+    if not filtro:
+        return "Site + App"
+    partes = []
+    for chave, valores in filtro.items():
+        if chave == "loja":
+            partes.append("Loja " + ", ".join(str(v) for v in valores))
+        else:
+            partes.append(" + ".join(str(v) for v in valores))
+    return " • ".join(partes)
+
+
+def seletor_granularidade() -> int:
+    """Minutos por slot; só há escolha quando o grid vem dos pedidos brutos."""
+    if not PEDIDOS_PATH.exists() and not FLUXO_PATH.exists():
+        return projecao_mod.SLOT_MINUTOS
+    with st.sidebar:
+        return st.selectbox(
+            "Granularidade dos slots",
+            options=list(GRANULARIDADES),
+            format_func=lambda m: f"{m} min",
+            key="slot_minutos",
+        )
 
 
-def authenticate(username: str, password: str, df_logins: pd.DataFrame):
-    row = df_logins[
-        (df_logins["usuario"] == username) &
-        (df_logins["senha"] == password)
-    ]
-    if not row.empty:
-        nome = row["nome"].iloc[0]
-        return True, nome
-    return False, None
+def seletor_modelo() -> str:
+    with st.sidebar:
+        return st.selectbox(
+            "Modelo de projeção",
+            options=list(projecao_mod.MODELOS),
+            format_func=lambda k: projecao_mod.MODELOS[k].nome,
+            key="modelo_projecao",
+        )
+
 
+def seletor_kiosk() -> int | None:
+    """Segundos entre conferências no modo TV (`?kiosk=30` na URL liga direto)."""
+    try:
+        pedido = int(st.query_params.get("kiosk", 0))
+    except ValueError:
+        pedido = 0
+    with st.sidebar:
+        ligado = st.toggle("📺 Modo TV (atualização automática)", value=pedido > 0, key="kiosk")
+        if not ligado:
+            return None
+        padrao = pedido if pedido in KIOSK_INTERVALOS else KIOSK_INTERVALOS[1]
+        return st.selectbox(
+            "Conferir dados a cada",
+            options=list(KIOSK_INTERVALOS),
+            index=KIOSK_INTERVALOS.index(padrao),
+            format_func=lambda s: f"{s} s",
+            key="kiosk_intervalo",
+        )
 
-@st.cache_data
-def load_grid_and_resumo(grid_path: Path, resumo_path: Path):
-    grid = pd.read_csv(grid_path)
-    resumo_df = pd.read_csv(resumo_path)
-    resumo = resumo_df.iloc[0].to_dict()
-    return grid, resumo
+
+def resumo_carga(leituras: dict[str, dict], divergencias: dict[str, int] | None = None):
+    """Tempo de leitura e memória de cada arquivo carregado, na barra lateral."""
+    if divergencias:
+        st.sidebar.warning(
+            "Colunas derivadas do CSV não batem com o recálculo a partir das "
+            "colunas brutas (o painel usa o recálculo): "
+            + ", ".join(f"{c} ({n})" for c, n in divergencias.items())
+        )
+    if not leituras:
+        return
+    with st.sidebar.expander("📦 Carga dos dados", expanded=False):
+        for nome, info in leituras.items():
+            st.caption(
+                f"`{nome}`: {fmt_number_br(info['linhas'], 0)} linhas em "
+                f"{fmt_number_br(info['segundos'] * 1000, 1)} ms · "
+                f"{fmt_number_br(info['bytes'] / 1024, 1)} KB em memória"
+            )
 
 
 # =========================================================
 # HELPERS: FORMATAÇÃO
 # =========================================================
+@lru_cache(maxsize=8192)
+def _fmt_br(valor: float, decimals: int, prefixo: str = "", sufixo: str = "") -> str:
+    # Não finitos (±inf) saem como "-", igual às colunas de `_fmt_br_array`.
+    if not np.isfinite(valor):
+        return "-"
+    # "_" como separador de milhar evita a troca em três passos de "," e ".".
+    fmt = f"{valor:_.{decimals}f}".replace(".", ",").replace("_", ".")
+    return f"{prefixo}{fmt}{sufixo}"
+
+
 def fmt_currency_br(x, decimals: int = 0) -> str:
     try:
         if x is None or np.isnan(x):
             return "-"
     except TypeError:
         pass
-    fmt = f"{float(x):,.{decimals}f}"
-    fmt = fmt.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"R$ {fmt}"
+    return _fmt_br(float(x), decimals, "R$ ")
 
 
 def fmt_percent_br(x, decimals: int = 2) -> str:
@@ -178,10 +490,7 @@ def fmt_percent_br(x, decimals: int = 2) -> str:
             return "-"
     except TypeError:
         return "-"
-    pct = float(x) * 100
-    fmt = f"{pct:,.{decimals}f}"
-    fmt = fmt.replace(",", "X").replace(".", ",").replace("X", ".")
-    return f"{fmt}%"
+    return _fmt_br(float(x) * 100, decimals, sufixo="%")
 
 
 def fmt_number_br(x, decimals: int = 2) -> str:
@@ -190,9 +499,50 @@ def fmt_number_br(x, decimals: int = 2) -> str:
             return "-"
     except TypeError:
         pass
-    fmt = f"{float(x):,.{decimals}f}"
-    fmt = fmt.replace(",", "X").replace(".", ",").replace("X", ".")
-    return fmt
+    return _fmt_br(float(x), decimals)
+
+
+def _fmt_br_array(valores, decimals: int, prefixo: str = "", sufixo: str = "") -> np.ndarray:
+    """Formata uma coluna inteira de uma vez.
+
+    Cada valor passa por um único `format`; a troca dos separadores para o
+    padrão brasileiro é feita uma vez só, sobre o texto da coluna inteira.
+    Valores não finitos (NaN, None, ±inf) viram "-", como nos escalares.
+    """
+    valores = np.asarray(valores, dtype=float)
+    saida = np.full(valores.shape, "-", dtype=object)
+    validos = np.isfinite(valores)
+    if validos.any():
+        fmt = f"{prefixo}{{:_.{decimals}f}}{sufixo}".format
+        texto = "\n".join(map(fmt, valores[validos].tolist()))
+        saida[validos] = texto.replace(".", ",").replace("_", ".").split("\n")
+    return saida
+
+
+def fmt_currency_br_array(valores, decimals: int = 0) -> np.ndarray:
+    return _fmt_br_array(valores, decimals, "R$ ")
+
+
+def fmt_percent_br_array(valores, decimals: int = 2) -> np.ndarray:
+    return _fmt_br_array(np.asarray(valores, dtype=float) * 100, decimals, sufixo="%")
+
+
+def fmt_number_br_array(valores, decimals: int = 2, sufixo: str = "") -> np.ndarray:
+    return _fmt_br_array(valores, decimals, sufixo=sufixo)
+
+
+@METRICAS.cache("tabela_grid_formatada", st.cache_data(max_entries=16))
+def tabela_grid_formatada(versao: str, _grid: pd.DataFrame) -> pd.DataFrame:
+    # Grid em texto pt-BR para a tabela slot a slot; uma vez por versão.
+    tabela = {"SLOT": _grid["SLOT"].to_numpy()}
+    for coluna in _grid.columns:
+        if coluna.startswith(("valor_", "acum_")):
+            tabela[coluna] = fmt_currency_br_array(_grid[coluna])
+        elif coluna == "frac_hist":
+            tabela[coluna] = fmt_percent_br_array(_grid[coluna], 2)
+        elif coluna.startswith("ritmo_"):
+            tabela[coluna] = fmt_number_br_array(_grid[coluna], 2, "x")
+    return pd.DataFrame(tabela)
 
 
 # =========================================================
@@ -237,9 +587,47 @@ def kpi_card(
     st.markdown(html_block, unsafe_allow_html=True)
 
 
-def gauge_ritmo(title: str, valor: float, tooltip: str = ""):
-    """Gauge centralizado e com tamanho uniforme, sem alterar mais nada do app."""
-    
+def vigia_kiosk(atualizador: dados.AtualizadorDados, intervalo: int, versao: str):
+    """Confere a cada `intervalo` s se os dados mudaram desde `versao`.
+
+    Um fragmento que roda de novo precisa redesenhar tudo o que está nele,
+    então os cards e gauges não ficam aqui: o fragmento só compara a versão
+    publicada com a última desenhada nesta sessão (`kiosk_versao`) e, quando
+    ela muda, pede um rerun completo. Enquanto os dados não mudam nenhuma
+    figura é refeita nem serializada; quando mudam, o rerun sai dos caches
+    por versão e o navegador só redesenha os elementos que ficaram diferentes.
+    """
+    st.session_state["kiosk_versao"] = versao
+
+    @st.fragment(run_every=intervalo)
+    def conferir():
+        with METRICAS.medir("kiosk"):
+            mudou = atualizador.versao != st.session_state.get("kiosk_versao")
+        if mudou:
+            st.rerun()
+
+    conferir()
+
+
+def plotly_chart(fig: go.Figure, **kwargs):
+    # Serializar a figura é parte relevante do rerun: cada gráfico é medido.
+    with METRICAS.medir("plotly_chart"):
+        st.plotly_chart(fig, **kwargs)
+
+
+def tema_atual() -> str:
+    """Tema do navegador ("dark"/"light"); escuro quando não dá para saber."""
+    try:
+        return st.context.theme.type or "dark"
+    except AttributeError:
+        return "dark"
+
+
+def cor_fonte(tema: str) -> str:
+    return "#222222" if tema == "light" else "#EEEEEE"
+
+
+def build_fig_gauge(title: str, valor: float, tema: str = "dark") -> go.Figure:
     max_range = max(1.6, abs(valor) * 1.3)
 
     fig = go.Figure(
@@ -271,8 +659,19 @@ def gauge_ritmo(title: str, valor: float, tooltip: str = ""):
         height=260,
         width=330,
         paper_bgcolor="rgba(0,0,0,0)",
-        font={"color": "#EEEEEE", "family": "sans-serif"},
+        font={"color": cor_fonte(tema), "family": "sans-serif"},
     )
+    return fig
+
+
+@METRICAS.cache("fig_gauge", st.cache_resource(max_entries=64))
+def fig_gauge(title: str, valor: float, tema: str) -> go.Figure:
+    return build_fig_gauge(title, valor, tema)
+
+
+def gauge_ritmo(title: str, valor: float, tooltip: str = ""):
+    """Gauge centralizado e com tamanho uniforme, sem alterar mais nada do app."""
+    fig = fig_gauge(title, valor, tema_atual())
 
     # 🔥 Centraliza o gauge sem alterar nada no layout
     st.markdown(
@@ -280,7 +679,7 @@ def gauge_ritmo(title: str, valor: float, tooltip: str = ""):
         unsafe_allow_html=True,
     )
 
-    st.plotly_chart(
+    plotly_chart(
         fig,
         use_container_width=False,
         config={"displayModeBar": False},
@@ -292,11 +691,235 @@ def gauge_ritmo(title: str, valor: float, tooltip: str = ""):
         st.caption(tooltip)
 
 
+# =========================================================
+# HELPERS: FIGURAS DAS CURVAS
+# =========================================================
+def build_fig_curvas(
+    curvas: pd.DataFrame,
+    colunas: list[str],
+    tema: str = "dark",
+    previsao: pd.DataFrame | None = None,
+) -> go.Figure:
+    # Só o que vai para o gráfico é reduzido; o grid segue com todos os slots.
+    curvas = curvas.iloc[amo.indices_series(curvas[colunas])]
+    fig_curvas = px.line(
+        curvas,
+        x="SLOT",
+        y=colunas,
+        labels={"value": "Valor (R$)", "SLOT": "Horário", "variable": "Curva"},
+    )
+    if previsao is not None:
+        # O primeiro ponto da previsão é o slot atual: emenda com o realizado.
+        valor_prev = previsao["valor_prev"].fillna(curvas["valor_hoje"].iloc[-1])
+        idx = amo.lttb(valor_prev)
+        fig_curvas.add_scatter(
+            x=previsao["SLOT"].iloc[idx],
+            y=valor_prev.iloc[idx],
+            mode="lines",
+            name="valor_hoje (previsto)",
+            line=dict(color=PRIMARY, dash="dash"),
+        )
+    fig_curvas.update_layout(
+        legend_title="Curva",
+        margin=dict(l=20, r=20, t=40, b=40),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font={"color": cor_fonte(tema)},
+    )
+    return fig_curvas
+
+
+def build_fig_ritmo(
+    grid: pd.DataFrame,
+    projecao: float,
+    tema: str = "dark",
+    previsao: pd.DataFrame | None = None,
+) -> go.Figure:
+    grid2 = grid.copy()
+    grid2["perc_dia_realizado"] = (
+        grid2["acum_hoje"] / projecao if projecao > 0 else 0
+    )
+
+    df_ritmo = pd.DataFrame(
+        {
+            "SLOT": grid2["SLOT"],
+            "Ritmo vs D-1": grid2["ritmo_vs_d1"],
+            "Ritmo vs D-7": grid2["ritmo_vs_d7"],
+            "Ritmo vs média do mês": grid2["ritmo_vs_media"],
+            "% do dia realizado (Hoje)": grid2["perc_dia_realizado"],
+        }
+    )
+    df_ritmo = df_ritmo.iloc[amo.indices_series(df_ritmo.drop(columns="SLOT"))]
+
+    fig_ritmo = px.line(
+        df_ritmo,
+        x="SLOT",
+        y=[
+            "Ritmo vs D-1",
+            "Ritmo vs D-7",
+            "Ritmo vs média do mês",
+            "% do dia realizado (Hoje)",
+        ],
+        labels={"value": "Índice", "SLOT": "Horário", "variable": "Métrica"},
+    )
+    if previsao is not None and projecao > 0:
+        idx = amo.lttb(previsao["acum_prev"])
+        fig_ritmo.add_scatter(
+            x=previsao["SLOT"].iloc[idx],
+            y=previsao["acum_prev"].iloc[idx] / projecao,
+            mode="lines",
+            name="% do dia realizado (previsto)",
+            line=dict(dash="dash"),
+        )
+    fig_ritmo.update_layout(
+        legend_title="Comparação",
+        margin=dict(l=20, r=20, t=40, b=40),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font={"color": cor_fonte(tema)},
+    )
+    return fig_ritmo
+
+
+def build_fig_heat(grid: pd.DataFrame, tema: str = "dark") -> go.Figure:
+    df_heat = pd.DataFrame(
+        {
+            "SLOT": grid["SLOT"],
+            "Hoje": grid["valor_hoje"],
+            "D-1": grid["valor_d1"],
+            "D-7": grid["valor_d7"],
+            "Média do mês": grid["valor_media_mes"],
+        }
+    )
+    df_melt = df_heat.melt(id_vars="SLOT", var_name="Dia", value_name="Valor")
+    heat_matrix = df_melt.pivot(index="Dia", columns="SLOT", values="Valor")
+    valores, inicio = amo.reduzir_colunas(heat_matrix.to_numpy())
+    heat_matrix = pd.DataFrame(
+        valores, index=heat_matrix.index, columns=heat_matrix.columns[inicio]
+    )
+
+    fig_heat = px.imshow(
+        heat_matrix,
+        color_continuous_scale="Viridis",
+        aspect="auto",
+        labels={"color": "Vendas (R$)"},
+    )
+    fig_heat.update_layout(
+        margin=dict(l=40, r=40, t=40, b=40),
+        paper_bgcolor="rgba(0,0,0,0)",
+        font={"color": cor_fonte(tema)},
+    )
+    return fig_heat
+
+
+@METRICAS.cache("figuras_curvas_ritmo", st.cache_resource(max_entries=16))
+def figuras_curvas_ritmo(
+    versao: str,
+    tema: str,
+    data_comp: str | None,
+    _grid: pd.DataFrame,
+    _resumo: dict,
+    _curva_comp: np.ndarray | None = None,
+    _previsao: pd.DataFrame | None = None,
+) -> dict[str, go.Figure]:
+    # A chave é só (versão dos dados, tema, data comparada): com os dados
+    # inalterados, mexer em widgets de outras abas não reconstrói as figuras.
+    # Quando a versão avança, `descartar_figuras` esvazia o cache.
+    curvas = _grid
+    colunas = ["valor_hoje", "valor_d1", "valor_d7", "valor_media_mes"]
+    if data_comp is not None and _curva_comp is not None:
+        coluna = f"valor_{pd.Timestamp(data_comp):%d/%m}"
+        curvas = _grid[["SLOT"] + colunas].assign(**{coluna: _curva_comp[: len(_grid)]})
+        colunas = colunas + [coluna]
+
+    return {
+        "curvas": build_fig_curvas(curvas, colunas, tema, _previsao),
+        "ritmo": build_fig_ritmo(_grid, float(_resumo["projecao_dia"]), tema, _previsao),
+        "heat": build_fig_heat(_grid, tema),
+    }
+
+
+def build_fig_leque(
+    grid: pd.DataFrame,
+    leque: np.ndarray,
+    meta_dia: float,
+    tema: str = "dark",
+) -> go.Figure:
+    slots = projecao_mod.rotulos_slot(1440 // leque.shape[1])
+    idx = amo.indices_series(leque.T)
+    slots, (p10, p50, p90) = slots[idx], leque[:, idx]
+    realizado = grid.iloc[amo.lttb(grid["acum_hoje"])]
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(x=slots, y=p90, line={"width": 0}, showlegend=False, hoverinfo="skip")
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=slots,
+            y=p10,
+            fill="tonexty",
+            fillcolor="rgba(0,176,255,0.25)",
+            line={"width": 0},
+            name="Faixa P10–P90",
+        )
+    )
+    fig.add_trace(
+        go.Scatter(x=slots, y=p50, line={"color": "#00B0FF", "dash": "dash"}, name="P50")
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=realizado["SLOT"],
+            y=realizado["acum_hoje"],
+            line={"color": PRIMARY},
+            name="Realizado",
+        )
+    )
+    if meta_dia > 0:
+        fig.add_hline(y=meta_dia, line_dash="dot", line_color=WARNING)
+    fig.update_layout(
+        xaxis_title="Horário",
+        yaxis_title="Acumulado (R$)",
+        legend={"orientation": "h", "y": 1.12},
+        margin=dict(l=20, r=20, t=40, b=40),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font={"color": cor_fonte(tema)},
+    )
+    return fig
+
+
+@METRICAS.cache("fig_leque", st.cache_resource(max_entries=16))
+def fig_leque(versao: str, tema: str, _grid: pd.DataFrame, _cenarios: dict, meta_dia: float):
+    return build_fig_leque(_grid, _cenarios["leque"], meta_dia, tema)
+
+
+@METRICAS.cache("fig_modelos", st.cache_resource(max_entries=16))
+def fig_modelos(versao: str, tema: str, _modelos: pd.DataFrame, meta_dia: float):
+    colunas = [k for k in projecao_mod.MODELOS if k in _modelos.columns]
+    _modelos = _modelos.iloc[amo.indices_series(_modelos[colunas])]
+    fig = px.line(
+        _modelos.rename(columns={k: projecao_mod.MODELOS[k].nome for k in colunas}),
+        x="SLOT",
+        y=[projecao_mod.MODELOS[k].nome for k in colunas],
+        labels={"value": "Projeção (R$)", "SLOT": "Horário", "variable": "Modelo"},
+    )
+    if meta_dia > 0:
+        fig.add_hline(y=meta_dia, line_dash="dot", line_color=WARNING)
+    fig.update_layout(
+        legend_title="Modelo",
+        margin=dict(l=20, r=20, t=40, b=40),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font={"color": cor_fonte(tema)},
+    )
+    return fig
+
 
 # =========================================================
 # TELA DE LOGIN
 # =========================================================
-def login_screen(df_logins: pd.DataFrame):
+def login_screen(autenticador: acesso.Autenticador):
     inject_global_css()
 
     # Banner topo
@@ -357,13 +980,21 @@ def login_screen(df_logins: pd.DataFrame):
         col_btn, col_info = st.columns([0.5, 0.5])
         with col_btn:
             if st.button("Entrar", type="primary", use_container_width=True):
-                ok, nome = authenticate(username.strip(), password.strip(), df_logins)
+                try:
+                    ok, nome = authenticate(username.strip(), password.strip(), autenticador)
+                except acesso.TentativasExcedidas as exc:
+                    st.error(
+                        "Muitas tentativas com senha errada para este usuário. "
+                        f"Tente de novo em {max(exc.segundos / 60, 1):.0f} min."
+                    )
+                    ok, nome = None, None
                 if ok:
                     st.session_state["auth"] = True
                     st.session_state["user"] = username.strip()
                     st.session_state["user_name"] = nome
-                    st.experimental_rerun()
-                else:
+                    st.session_state["escopo"] = autenticador.credenciais[username.strip()].escopo
+                    st.rerun()
+                elif ok is not None:
                     st.error(
                         "Usuário ou senha inválidos. Confira os dados ou fale com o time de Dados."
                     )
@@ -377,59 +1008,62 @@ def login_screen(df_logins: pd.DataFrame):
 # =========================================================
 # PAINEL 1 – VISÃO GERAL
 # =========================================================
-def painel_visao_geral(grid: pd.DataFrame, resumo: dict, user_name: str):
-    data_ref = pd.to_datetime(resumo["data_referencia"]).date()
+def kpis_principais(grid: pd.DataFrame, resumo: dict, canal: str = "Site + App"):
     meta_dia   = float(resumo["meta_dia"])
     venda_atual = float(resumo["venda_atual_ate_slot"])
     projecao   = float(resumo["projecao_dia"])
     gap        = float(resumo["desvio_projecao"])
-    total_d1   = float(resumo["total_d1"])
-    total_d7   = float(resumo["total_d7"])
-    ritmo_d1   = float(resumo["ritmo_vs_d1"])
-    ritmo_d7   = float(resumo["ritmo_vs_d7"])
-    ritmo_med  = float(resumo["ritmo_vs_media"])
     frac_hist  = float(resumo["percentual_dia_hist"])
-
-    st.markdown(
-        f"""
-        <div style="margin-bottom:10px;font-size:0.9rem;color:#BBBBBB;">
-            Usuário: <b>{html.escape(user_name)}</b> • Data de referência:
-            <b>{data_ref.strftime('%d/%m/%Y')}</b> • Canal: Site + App
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    # === KPIs PRINCIPAIS ===
-    c1, c2, c3, c4 = st.columns(4)
-    with c1:
-        kpi_card(
-            "Meta do dia",
-            fmt_currency_br(meta_dia),
-            "Meta consolidada Site + App para a data.",
-            color=PRIMARY,
-            tooltip="Meta financeira total do dia, considerando todos os canais digitais (site + app).",
-        )
+    minutos_slot = projecao_mod.minutos_por_slot(grid["SLOT"].to_numpy())
+    com_meta = bool(np.isfinite(meta_dia))
+
+    if com_meta:
+        c1, c2, c3, c4 = st.columns(4)
+        with c1:
+            kpi_card(
+                "Meta do dia",
+                fmt_currency_br(meta_dia),
+                f"Meta consolidada {canal} para a data.",
+                color=PRIMARY,
+                tooltip="Meta financeira total do dia, considerando todos os canais digitais (site + app).",
+            )
+    else:
+        # Recorte que o arquivo de metas não tem: sem meta, sem os cards dela.
+        c2, c3 = st.columns(2)
 
     with c2:
         perc_meta = venda_atual / meta_dia if meta_dia > 0 else 0
         kpi_card(
             "Venda atual",
             fmt_currency_br(venda_atual),
-            f"Equivalente a {fmt_percent_br(perc_meta, 1)} da meta.",
-            color=PRIMARY if perc_meta >= frac_hist else WARNING,
-            tooltip="Faturamento realizado até o último slot de 15 minutos.",
+            (
+                f"Equivalente a {fmt_percent_br(perc_meta, 1)} da meta."
+                if com_meta
+                else "Sem meta para este recorte no arquivo de metas."
+            ),
+            color=PRIMARY if not com_meta or perc_meta >= frac_hist else WARNING,
+            tooltip=f"Faturamento realizado até o último slot de {minutos_slot} minutos.",
         )
 
     with c3:
         kpi_card(
             "Projeção de fechamento",
             fmt_currency_br(projecao),
-            "Baseada na curva intradia histórica e no padrão do mês.",
+            (
+                f"Modelo: {projecao_mod.MODELOS[resumo['modelo_projecao']].nome}."
+                if resumo.get("modelo_projecao")
+                else "Baseada na curva intradia histórica e no padrão do mês."
+            ),
             color=WARNING if projecao < meta_dia else PRIMARY,
-            tooltip="Calculada projetando o faturamento atual pela fração histórica vendida até esse horário.",
+            tooltip=(
+                projecao_mod.MODELOS[resumo["modelo_projecao"]].descricao
+                if resumo.get("modelo_projecao")
+                else "Calculada projetando o faturamento atual pela fração histórica vendida até esse horário."
+            ),
         )
 
+    if not com_meta:
+        return
     with c4:
         gap_label = "Acima da meta" if gap >= 0 else "Abaixo da meta"
         gap_color = PRIMARY if gap >= 0 else DANGER
@@ -441,10 +1075,14 @@ def painel_visao_geral(grid: pd.DataFrame, resumo: dict, user_name: str):
             tooltip="Diferença entre a projeção de fechamento e a meta consolidada do dia.",
         )
 
-    st.markdown("---")
 
-    # === RITMOS & COMPARATIVOS ===
-    st.subheader("📈 Ritmo do dia", divider="gray")
+def kpis_ritmo(grid: pd.DataFrame, resumo: dict):
+    total_d1   = float(resumo["total_d1"])
+    total_d7   = float(resumo["total_d7"])
+    ritmo_d1   = float(resumo["ritmo_vs_d1"])
+    ritmo_d7   = float(resumo["ritmo_vs_d7"])
+    ritmo_med  = float(resumo["ritmo_vs_media"])
+    frac_hist  = float(resumo["percentual_dia_hist"])
 
     c5, c6, c7, c8 = st.columns(4)
     with c5:
@@ -495,6 +1133,96 @@ def painel_visao_geral(grid: pd.DataFrame, resumo: dict, user_name: str):
             ),
         )
 
+
+@METRICAS.cronometrar()
+def painel_visao_geral(
+    grid: pd.DataFrame,
+    resumo: dict,
+    user_name: str,
+    canal: str = "Site + App",
+    aberturas: dict[str, pd.Series] | None = None,
+    cenarios: dict | None = None,
+    versao: str | None = None,
+    modelos: pd.DataFrame | None = None,
+):
+    data_ref = pd.to_datetime(resumo["data_referencia"]).date()
+    meta_dia   = float(resumo["meta_dia"])
+    venda_atual = float(resumo["venda_atual_ate_slot"])
+    projecao   = float(resumo["projecao_dia"])
+    gap        = float(resumo["desvio_projecao"])
+    ritmo_d1   = float(resumo["ritmo_vs_d1"])
+    ritmo_d7   = float(resumo["ritmo_vs_d7"])
+    ritmo_med  = float(resumo["ritmo_vs_media"])
+    frac_hist  = float(resumo["percentual_dia_hist"])
+    minutos_slot = projecao_mod.minutos_por_slot(grid["SLOT"].to_numpy())
+
+    st.markdown(
+        f"""
+        <div style="margin-bottom:10px;font-size:0.9rem;color:#BBBBBB;">
+            Usuário: <b>{html.escape(user_name)}</b> • Data de referência:
+            <b>{data_ref.strftime('%d/%m/%Y')}</b> • Canal: {html.escape(canal)}
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # === KPIs PRINCIPAIS ===
+    kpis_principais(grid, resumo, canal)
+
+    # === FAIXA DE FECHAMENTO (CENÁRIOS) ===
+    if cenarios is not None:
+        st.subheader("🎲 Faixa de fechamento", divider="gray")
+        com_meta = bool(np.isfinite(cenarios["prob_meta"]))
+        f1, f2, f3, *f4 = st.columns(4 if com_meta else 3)
+        origem = (
+            f"Projeções com a curva intradia de cada um dos {cenarios['n_dias']} dias "
+            "históricos com venda até este slot."
+        )
+        with f1:
+            kpi_card(
+                "Fechamento P10",
+                fmt_currency_br(cenarios["p10"]),
+                "Cenário pessimista (90% dos dias projetam acima).",
+                color=WARNING,
+                tooltip=origem,
+            )
+        with f2:
+            kpi_card(
+                "Fechamento P50",
+                fmt_currency_br(cenarios["p50"]),
+                "Cenário central.",
+                color=PRIMARY,
+                tooltip=origem,
+            )
+        with f3:
+            kpi_card(
+                "Fechamento P90",
+                fmt_currency_br(cenarios["p90"]),
+                "Cenário otimista (só 10% dos dias projetam acima).",
+                color=PRIMARY,
+                tooltip=origem,
+            )
+        if com_meta:
+            with f4[0]:
+                prob = cenarios["prob_meta"]
+                kpi_card(
+                    "Chance de bater a meta",
+                    fmt_percent_br(prob, 0),
+                    "Fração dos dias históricos cuja curva projeta fechar acima da meta.",
+                    color=PRIMARY if prob >= 0.5 else DANGER,
+                    tooltip=origem,
+                )
+        plotly_chart(
+            fig_leque(versao or "", tema_atual(), grid, cenarios, meta_dia),
+            use_container_width=True,
+        )
+
+    st.markdown("---")
+
+    # === RITMOS & COMPARATIVOS ===
+    st.subheader("📈 Ritmo do dia", divider="gray")
+    kpis_ritmo(grid, resumo)
+
     # Explicação
     with st.expander("🧠 Como interpretar os ritmos", expanded=False):
         st.markdown(
@@ -509,10 +1237,79 @@ def painel_visao_geral(grid: pd.DataFrame, resumo: dict, user_name: str):
             """
         )
 
+    # === MODELOS DE PROJEÇÃO ===
+    if modelos is not None:
+        with st.expander("⚖️ Comparar modelos de projeção", expanded=False):
+            chaves = [k for k in projecao_mod.MODELOS if k in modelos.columns]
+            finais = modelos[chaves].iloc[-1]
+            st.dataframe(
+                pd.DataFrame(
+                    {
+                        "Modelo": [projecao_mod.MODELOS[k].nome for k in chaves],
+                        "Projeção": fmt_currency_br_array(finais),
+                        "Gap vs meta": fmt_currency_br_array(np.asarray(finais) - meta_dia),
+                        "Como funciona": [projecao_mod.MODELOS[k].descricao for k in chaves],
+                    }
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
+            plotly_chart(
+                fig_modelos(versao or "", tema_atual(), modelos, meta_dia),
+                use_container_width=True,
+            )
+            st.caption("Projeção de fechamento que cada modelo mostraria em cada horário do dia.")
+
+    # === ABERTURA POR DIMENSÃO ===
+    if aberturas:
+        with st.expander("🏬 Abertura da venda de hoje", expanded=False):
+            dim = st.radio(
+                "Abrir por",
+                options=list(aberturas),
+                format_func=lambda k: ROTULOS_DIMENSAO.get(k, k),
+                horizontal=True,
+            )
+            serie = aberturas[dim]
+            total = serie.sum()
+            tabela = pd.DataFrame(
+                {
+                    ROTULOS_DIMENSAO.get(dim, dim): serie.index.astype(str),
+                    "Venda": fmt_currency_br_array(serie.to_numpy()),
+                    "Participação": fmt_percent_br_array(
+                        serie.to_numpy() / total if total else np.full(len(serie), np.nan), 1
+                    ),
+                }
+            )
+            st.dataframe(tabela, use_container_width=True, hide_index=True)
+
     # === ANÁLISE EXECUTIVA ===
     st.subheader("📝 Análise executiva da projeção", divider="gray")
 
     frac_txt = fmt_percent_br(frac_hist, 2)
+    conclusao_meta = (
+        f", o que implica um gap de **{fmt_currency_br(gap)}** "
+        f"em relação à meta de **{fmt_currency_br(meta_dia)}**"
+        if np.isfinite(meta_dia)
+        else " (sem meta para este recorte)"
+    )
+    modelo = resumo.get("modelo_projecao")
+    if modelo:
+        # Outro modelo escolhido: a conta pela curva histórica aparece à parte.
+        base_frac = venda_atual / frac_hist if frac_hist > 0 else np.nan
+        passo_projecao = (
+            f"- Aplicamos o modelo **{projecao_mod.MODELOS[modelo].nome}**: "
+            f"{projecao_mod.MODELOS[modelo].descricao}  \n"
+            f"           - Pela curva histórica pura (*venda_atual / frac_hist*), o fechamento "
+            f"seria **{fmt_currency_br(base_frac)}**.  \n"
+            f"           - Com o modelo escolhido, a projeção de fechamento fica em torno de "
+            f"**{fmt_currency_br(projecao)}** para o dia."
+        )
+    else:
+        passo_projecao = (
+            "- Dividimos esse valor pela fração histórica do horário (*venda_atual / frac_hist*).  \n"
+            "           - Isso gera uma projeção de fechamento em torno de "
+            f"**{fmt_currency_br(projecao)}** para o dia."
+        )
     st.markdown(
         f"""
         ### Como a projeção é construída
@@ -520,13 +1317,12 @@ def painel_visao_geral(grid: pd.DataFrame, resumo: dict, user_name: str):
         A projeção de fechamento usa um modelo em três camadas:
 
         1. **Curva intradia histórica**  
-           - Para cada slot de 15 minutos, medimos que fração do faturamento diário costuma estar realizada ao longo do mês.  
+           - Para cada slot de {minutos_slot} minutos, medimos que fração do faturamento diário costuma estar realizada ao longo do mês.  
            - No horário atual, o padrão histórico indica que cerca de **{frac_txt}** do dia já deveria estar vendido.
 
         2. **Base matemática da projeção**  
            - Consideramos a venda acumulada de hoje até o último slot: **{fmt_currency_br(venda_atual)}**.  
-           - Dividimos esse valor pela fração histórica do horário (*venda_atual / frac_hist*).  
-           - Isso gera uma projeção de fechamento em torno de **{fmt_currency_br(projecao)}** para o dia.
+           {passo_projecao}
 
         3. **Camada de consistência por ritmo**  
            - Em paralelo, monitoramos os ritmos:  
@@ -537,8 +1333,7 @@ def painel_visao_geral(grid: pd.DataFrame, resumo: dict, user_name: str):
            - Eles funcionam como uma *checagem de consistência*: se o dia foge muito do padrão, isso aparece imediatamente nesses índices.
 
         **Conclusão executiva**  
-        - Projetamos o fechamento em **{fmt_currency_br(projecao)}**, o que implica um gap de **{fmt_currency_br(gap)}**
-          em relação à meta de **{fmt_currency_br(meta_dia)}**.  
+        - Projetamos o fechamento em **{fmt_currency_br(projecao)}**{conclusao_meta}.  
         """
     )
 
@@ -546,61 +1341,47 @@ def painel_visao_geral(grid: pd.DataFrame, resumo: dict, user_name: str):
 # =========================================================
 # PAINEL 2 – CURVAS & RITMO
 # =========================================================
-def painel_curvas_ritmo(grid: pd.DataFrame, resumo: dict):
+@METRICAS.cronometrar()
+def painel_curvas_ritmo(
+    grid: pd.DataFrame,
+    resumo: dict,
+    historico: hist.HistoricoVendas | None = None,
+    filtro: dict | None = None,
+    versao: str | None = None,
+    previsao: pd.DataFrame | None = None,
+):
     st.subheader("📊 Curvas de venda (DDT)", divider="gray")
 
-    fig_curvas = px.line(
-        grid,
-        x="SLOT",
-        y=["valor_hoje", "valor_d1", "valor_d7", "valor_media_mes"],
-        labels={"value": "Valor (R$)", "SLOT": "Horário", "variable": "Curva"},
-    )
-    fig_curvas.update_layout(
-        legend_title="Curva",
-        margin=dict(l=20, r=20, t=40, b=40),
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font={"color": "#EEEEEE"},
+    data_comp, curva_comp = None, None
+    datas_hist = historico.datas() if historico is not None else []
+    if len(datas_hist):
+        data_ref = pd.to_datetime(resumo["data_referencia"])
+        escolha = st.selectbox(
+            "Comparar também com a data",
+            options=[None] + [d.date() for d in reversed(datas_hist) if d < data_ref],
+            format_func=lambda d: "—" if d is None else d.strftime("%d/%m/%Y"),
+        )
+        if escolha is not None:
+            data_comp = str(escolha)
+            curva_comp = load_curva_historica(
+                historico.raiz,
+                data_comp,
+                dados.chave_filtro(filtro),
+                historico.slot_minutos,
+            )
+
+    figs = figuras_curvas_ritmo(
+        versao or "", tema_atual(), data_comp, grid, resumo, curva_comp, previsao
     )
-    st.plotly_chart(fig_curvas, use_container_width=True)
+    plotly_chart(figs["curvas"], use_container_width=True)
+    if previsao is not None:
+        st.caption(
+            "Tracejado: previsão do resto do dia, distribuindo o que falta para a "
+            "projeção conforme o formato histórico da curva."
+        )
 
     st.subheader("📈 Ritmos ao longo do dia", divider="gray")
-
-    projecao = float(resumo["projecao_dia"])
-    grid2 = grid.copy()
-    grid2["perc_dia_realizado"] = (
-        grid2["acum_hoje"] / projecao if projecao > 0 else 0
-    )
-
-    df_ritmo = pd.DataFrame(
-        {
-            "SLOT": grid2["SLOT"],
-            "Ritmo vs D-1": grid2["ritmo_vs_d1"],
-            "Ritmo vs D-7": grid2["ritmo_vs_d7"],
-            "Ritmo vs média do mês": grid2["ritmo_vs_media"],
-            "% do dia realizado (Hoje)": grid2["perc_dia_realizado"],
-        }
-    )
-
-    fig_ritmo = px.line(
-        df_ritmo,
-        x="SLOT",
-        y=[
-            "Ritmo vs D-1",
-            "Ritmo vs D-7",
-            "Ritmo vs média do mês",
-            "% do dia realizado (Hoje)",
-        ],
-        labels={"value": "Índice", "SLOT": "Horário", "variable": "Métrica"},
-    )
-    fig_ritmo.update_layout(
-        legend_title="Comparação",
-        margin=dict(l=20, r=20, t=40, b=40),
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font={"color": "#EEEEEE"},
-    )
-    st.plotly_chart(fig_ritmo, use_container_width=True)
+    plotly_chart(figs["ritmo"], use_container_width=True)
 
     st.caption(
         "- As três primeiras linhas são ritmos (x vezes a referência).  \n"
@@ -609,6 +1390,20 @@ def painel_curvas_ritmo(grid: pd.DataFrame, resumo: dict):
 
     # Gauges de ritmo
     st.subheader("🧭 Saúde do dia – gauges de ritmo", divider="gray")
+    gauges_ritmo(grid, resumo)
+
+    st.subheader("🔥 Mapa de calor – intensidade por horário", divider="gray")
+    plotly_chart(figs["heat"], use_container_width=True)
+
+    with st.expander("🧾 Tabela completa (slot a slot)", expanded=False):
+        st.dataframe(
+            tabela_grid_formatada(versao or "", grid),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
+def gauges_ritmo(grid: pd.DataFrame, resumo: dict):
     ritmo_d1 = float(resumo["ritmo_vs_d1"])
     ritmo_d7 = float(resumo["ritmo_vs_d7"])
     ritmo_med = float(resumo["ritmo_vs_media"])
@@ -633,57 +1428,91 @@ def painel_curvas_ritmo(grid: pd.DataFrame, resumo: dict):
             "1,00x = comportamento igual à média do mês nesse horário.",
         )
 
-    st.subheader("🔥 Mapa de calor – intensidade por horário", divider="gray")
 
-    df_heat = pd.DataFrame(
-        {
-            "SLOT": grid["SLOT"],
-            "Hoje": grid["valor_hoje"],
-            "D-1": grid["valor_d1"],
-            "D-7": grid["valor_d7"],
-            "Média do mês": grid["valor_media_mes"],
-        }
+# =========================================================
+# PAINEL 3 – SIMULAÇÃO DE META
+# =========================================================
+META_PASSO = 50000
+
+
+def faixa_meta(meta_atual: float) -> tuple[int, int]:
+    return int(meta_atual * 0.5), int(meta_atual * 1.5)
+
+
+def build_fig_varredura(
+    meta_atual: float,
+    projecao: float,
+    venda_atual: float,
+    tema: str = "dark",
+) -> go.Figure:
+    minimo, maximo = faixa_meta(meta_atual)
+    varredura = projecao_mod.varrer_metas(
+        projecao, venda_atual, np.arange(minimo, maximo + 1, META_PASSO)
     )
-    df_melt = df_heat.melt(id_vars="SLOT", var_name="Dia", value_name="Valor")
-    heat_matrix = df_melt.pivot(index="Dia", columns="SLOT", values="Valor")
 
-    fig_heat = px.imshow(
-        heat_matrix,
-        color_continuous_scale="Viridis",
-        aspect="auto",
-        labels={"color": "Vendas (R$)"},
+    fig = go.Figure()
+    fig.add_trace(
+        go.Bar(
+            x=varredura["meta"],
+            y=varredura["gap"],
+            name="Gap projetado (R$)",
+            marker_color=np.where(varredura["gap"] >= 0, PRIMARY, DANGER),
+        )
     )
-    fig_heat.update_layout(
-        margin=dict(l=40, r=40, t=40, b=40),
+    fig.add_trace(
+        go.Scatter(
+            x=varredura["meta"],
+            y=varredura["cobertura"],
+            name="Cobertura da projeção",
+            yaxis="y2",
+            line={"color": WARNING},
+        )
+    )
+    fig.add_vline(x=meta_atual, line_dash="dot", line_color="#888888")
+    fig.update_layout(
+        xaxis_title="Meta simulada (R$)",
+        yaxis={"title": "Gap (R$)"},
+        yaxis2={
+            "title": "Cobertura",
+            "overlaying": "y",
+            "side": "right",
+            "tickformat": ".0%",
+        },
+        legend={"orientation": "h", "y": 1.12},
+        margin=dict(l=20, r=20, t=40, b=40),
         paper_bgcolor="rgba(0,0,0,0)",
-        font={"color": "#EEEEEE"},
+        plot_bgcolor="rgba(0,0,0,0)",
+        font={"color": cor_fonte(tema)},
     )
-    st.plotly_chart(fig_heat, use_container_width=True)
+    return fig
 
-    with st.expander("🧾 Tabela completa (slot a slot)", expanded=False):
-        st.dataframe(grid, use_container_width=True)
 
+@METRICAS.cache("fig_varredura", st.cache_resource(max_entries=16))
+def fig_varredura(versao: str, tema: str, _resumo: dict) -> go.Figure:
+    return build_fig_varredura(
+        float(_resumo["meta_dia"]),
+        float(_resumo["projecao_dia"]),
+        float(_resumo["venda_atual_ate_slot"]),
+        tema,
+    )
 
-# =========================================================
-# PAINEL 3 – SIMULAÇÃO DE META
-# =========================================================
-def painel_simulacao_meta(resumo: dict):
-    st.subheader("🎯 Simulação de meta e gap", divider="gray")
 
+@st.fragment
+@METRICAS.cronometrar()
+def simulador_meta(resumo: dict):
+    # Fragmento: mexer no slider reroda só este bloco (slider, cards e
+    # texto), sem login, CSS, carga de dados ou gráficos das outras abas.
     meta_atual   = float(resumo["meta_dia"])
     projecao     = float(resumo["projecao_dia"])
     venda_atual  = float(resumo["venda_atual_ate_slot"])
-
-    st.write(
-        "Use o controle abaixo para testar diferentes metas e ver o novo gap projetado."
-    )
+    minimo, maximo = faixa_meta(meta_atual)
 
     nova_meta = st.slider(
         "Meta simulada (R$)",
-        min_value=int(meta_atual * 0.5),
-        max_value=int(meta_atual * 1.5),
+        min_value=minimo,
+        max_value=maximo,
         value=int(meta_atual),
-        step=50000,
+        step=META_PASSO,
         format="%d",
     )
 
@@ -724,17 +1553,349 @@ def painel_simulacao_meta(resumo: dict):
     )
 
 
+@METRICAS.cronometrar()
+def painel_simulacao_meta(resumo: dict, versao: str | None = None):
+    st.subheader("🎯 Simulação de meta e gap", divider="gray")
+    if not np.isfinite(float(resumo["meta_dia"])):
+        st.info(
+            "O arquivo de metas não tem a dimensão deste recorte, então não há "
+            "meta oficial para simular. Tire o filtro para ver a simulação."
+        )
+        return
+
+    st.write(
+        "Use o controle abaixo para testar diferentes metas e ver o novo gap projetado."
+    )
+
+    simulador_meta(resumo)
+
+    st.subheader("📉 Gap e cobertura em toda a faixa de metas", divider="gray")
+    plotly_chart(fig_varredura(versao or "", tema_atual(), resumo), use_container_width=True)
+    st.caption(
+        "Barras: gap projetado para cada meta entre 50% e 150% da oficial. "
+        "Linha: cobertura da meta pela projeção. Pontilhado: meta oficial."
+    )
+
+
+# =========================================================
+# PAINEL 4 – BACKTEST DA PROJEÇÃO
+# =========================================================
+@METRICAS.cronometrar()
+def painel_backtest(resultado: dict):
+    st.subheader("🧪 Quão boa foi a projeção em cada horário?", divider="gray")
+
+    tabela = resultado["tabela"]
+    n_dias = len(resultado["datas"])
+    st.caption(
+        "Projeção (acumulado / frac_hist dos dias anteriores do mesmo mês, como no painel) "
+        f"recalculada em todos os slots de {n_dias} dias do histórico e comparada "
+        "com o fechamento real de cada dia."
+    )
+
+    destaques = tabela.set_index("SLOT").reindex(["10:00", "14:00", "18:00"]).dropna()
+    colunas = st.columns(max(len(destaques), 1))
+    for col, (slot, linha) in zip(colunas, destaques.iterrows()):
+        with col:
+            kpi_card(
+                f"Erro médio às {slot}",
+                fmt_percent_br(linha["mape"], 1),
+                f"Viés de {fmt_percent_br(linha['vies'], 1)} (positivo = projeção acima do real).",
+                color=PRIMARY if linha["mape"] < 0.05 else WARNING,
+                tooltip="MAPE: média do erro absoluto relativo entre projeção e fechamento.",
+            )
+
+    fig_erro = px.line(
+        tabela.iloc[amo.indices_series(tabela[["mape", "vies"]])],
+        x="SLOT",
+        y=["mape", "vies"],
+        labels={"value": "Erro relativo", "SLOT": "Horário", "variable": "Métrica"},
+    )
+    fig_erro.update_layout(
+        legend_title="Métrica",
+        yaxis_tickformat=".0%",
+        margin=dict(l=20, r=20, t=40, b=40),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font={"color": cor_fonte(tema_atual())},
+    )
+    plotly_chart(fig_erro, use_container_width=True)
+
+    st.subheader("🔥 Erro por dia e horário", divider="gray")
+    erro, inicio = amo.reduzir_colunas(resultado["erro"])
+    fig_heat = px.imshow(
+        erro,
+        x=resultado["slots"][inicio],
+        y=[pd.Timestamp(d).strftime("%d/%m/%Y") for d in resultado["datas"]],
+        color_continuous_scale="RdBu_r",
+        zmin=-0.3,
+        zmax=0.3,
+        aspect="auto",
+        labels={"color": "Erro", "x": "Horário", "y": "Dia"},
+    )
+    fig_heat.update_layout(
+        margin=dict(l=40, r=40, t=40, b=40),
+        paper_bgcolor="rgba(0,0,0,0)",
+        font={"color": cor_fonte(tema_atual())},
+    )
+    plotly_chart(fig_heat, use_container_width=True)
+
+    with st.expander("🧾 Erro por slot (tabela)", expanded=False):
+        st.dataframe(
+            tabela.assign(
+                mape=fmt_percent_br_array(tabela["mape"], 2),
+                vies=fmt_percent_br_array(tabela["vies"], 2),
+            ).rename(columns={"mape": "MAPE", "vies": "Viés", "dias": "Dias"}),
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
+# =========================================================
+# PAINEL 5 – DESEMPENHO (ADMIN)
+# =========================================================
+@METRICAS.cronometrar()
+def painel_desempenho(atualizador: dados.AtualizadorDados):
+    st.subheader("⏱️ Tempo por etapa", divider="gray")
+    METRICAS.contar_cache("recortes (atualizador)", *atualizador.estatisticas_memo())
+
+    tempos = METRICAS.tabela_tempos()
+    rerun = tempos.set_index("etapa").reindex(["rerun"]).dropna()
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        kpi_card(
+            "Sessões ativas",
+            fmt_number_br(METRICAS.sessoes_ativas(), 0),
+            "Sessões com rerun nos últimos 5 minutos, neste processo.",
+        )
+    for col, quantil in [(c2, "p50"), (c3, "p95")]:
+        with col:
+            valor = rerun[quantil].iloc[0] * 1000 if len(rerun) else np.nan
+            kpi_card(
+                f"Rerun {quantil}",
+                f"{fmt_number_br(valor, 0)} ms",
+                "Tempo do script inteiro por rerun, nas últimas execuções.",
+            )
+
+    st.dataframe(
+        pd.DataFrame(
+            {
+                "Etapa": tempos["etapa"],
+                "Execuções": tempos["n"],
+                "p50 (ms)": fmt_number_br_array(tempos["p50"] * 1000, 1),
+                "p95 (ms)": fmt_number_br_array(tempos["p95"] * 1000, 1),
+                "Média (ms)": fmt_number_br_array(tempos["media"] * 1000, 1),
+                "Total (s)": fmt_number_br_array(tempos["soma"], 1),
+            }
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    st.subheader("🗃️ Caches", divider="gray")
+    cache = METRICAS.tabela_cache()
+    taxa = np.where(cache["chamadas"] > 0, cache["acertos"] / cache["chamadas"].clip(lower=1), np.nan)
+    st.dataframe(
+        cache.rename(
+            columns={"cache": "Cache", "chamadas": "Chamadas", "acertos": "Acertos", "faltas": "Faltas"}
+        ).assign(**{"Taxa de acerto": fmt_percent_br_array(taxa, 1)}),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    st.subheader("📦 Leitura dos arquivos", divider="gray")
+    leituras = atualizador.carregador.leituras
+    if leituras:
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Arquivo": list(leituras),
+                    "Linhas": [v["linhas"] for v in leituras.values()],
+                    "Leitura (ms)": fmt_number_br_array(
+                        [v["segundos"] * 1000 for v in leituras.values()], 1
+                    ),
+                    "Memória (KB)": fmt_number_br_array(
+                        [v["bytes"] / 1024 for v in leituras.values()], 1
+                    ),
+                }
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+    st.caption(
+        f"As mesmas métricas são gravadas em `{METRICAS_PATH}` no formato texto do "
+        "Prometheus (no máximo a cada 5 s)."
+    )
+
+
+# =========================================================
+# PAINEL 6 – LINHA DO TEMPO DO DIA
+# =========================================================
+def build_fig_convergencia(tabela: pd.DataFrame, tema: str = "dark") -> go.Figure:
+    colunas = ["projecao_dia", "venda_atual_ate_slot"]
+    tabela = tabela.iloc[amo.indices_series(tabela[colunas])]
+    fig = px.line(
+        tabela.rename(
+            columns={
+                "projecao_dia": "Projeção de fechamento",
+                "venda_atual_ate_slot": "Venda acumulada",
+            }
+        ),
+        x="SLOT",
+        y=["Projeção de fechamento", "Venda acumulada"],
+        markers=len(tabela) < 60,
+        labels={"value": "Valor (R$)", "SLOT": "Horário", "variable": "Série"},
+    )
+    meta = float(tabela["meta_dia"].iloc[-1]) if len(tabela) else 0.0
+    if meta > 0:
+        fig.add_hline(y=meta, line_dash="dot", line_color=WARNING, annotation_text="Meta")
+    fig.update_layout(
+        legend_title="Série",
+        margin=dict(l=20, r=20, t=40, b=40),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font={"color": cor_fonte(tema)},
+    )
+    return fig
+
+
+@METRICAS.cache("fig_convergencia", st.cache_resource(max_entries=16))
+def fig_convergencia(versao: str, tema: str, _tabela: pd.DataFrame) -> go.Figure:
+    return build_fig_convergencia(_tabela, tema)
+
+
+@st.fragment
+@METRICAS.cronometrar()
+def replay_dia(linha: lt.LinhaTempo):
+    # Fragmento: arrastar o controle só lê uma posição do buffer e redesenha
+    # os cards, sem recarregar dados nem refazer o gráfico de convergência.
+    slots = linha.slots()
+    rotulos = projecao_mod.rotulos_slot(linha.slot_minutos)
+    slot = st.select_slider(
+        "Painel às",
+        options=slots.tolist(),
+        value=int(slots[-1]),
+        format_func=lambda s: rotulos[s],
+    )
+    naquele = linha.em(slot)
+    final = linha.em(int(slots[-1]))
+
+    meta = naquele["meta_dia"]
+    gap = naquele["desvio_projecao"]
+    ritmos = [naquele[c] for c in ("ritmo_vs_d1", "ritmo_vs_d7", "ritmo_vs_media")]
+    ritmo_comb = float(np.nanmean(ritmos)) if not np.all(np.isnan(ritmos)) else np.nan
+
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        perc_meta = naquele["venda_atual_ate_slot"] / meta if meta > 0 else 0
+        kpi_card(
+            f"Venda até {naquele['SLOT']}",
+            fmt_currency_br(naquele["venda_atual_ate_slot"]),
+            f"Equivalente a {fmt_percent_br(perc_meta, 1)} da meta.",
+            color=PRIMARY,
+        )
+    with c2:
+        kpi_card(
+            "Projeção naquele momento",
+            fmt_currency_br(naquele["projecao_dia"]),
+            f"Hoje às {final['SLOT']}: {fmt_currency_br(final['projecao_dia'])}.",
+            color=WARNING if naquele["projecao_dia"] < meta else PRIMARY,
+            tooltip="Projeção de fechamento que o painel mostrava nesse horário.",
+        )
+    with c3:
+        kpi_card(
+            "Gap projetado vs meta",
+            fmt_currency_br(gap),
+            "Acima da meta." if gap >= 0 else "Abaixo da meta.",
+            color=PRIMARY if gap >= 0 else DANGER,
+        )
+    with c4:
+        kpi_card(
+            "Ritmo combinado",
+            f"{fmt_number_br(ritmo_comb, 2)}x",
+            f"Dia já percorrido: {fmt_percent_br(naquele['percentual_dia_hist'], 1)}.",
+            color=PRIMARY if ritmo_comb >= 1.0 else WARNING,
+        )
+
+
+@METRICAS.cronometrar()
+def painel_linha_tempo(linha: lt.LinhaTempo):
+    st.subheader("⏪ O painel ao longo do dia", divider="gray")
+    st.caption(
+        "Cada versão dos dados fica registrada no slot em que foi publicada "
+        "(projeção do modelo padrão, visão consolidada). Escolha um horário "
+        "para ver os números como estavam."
+    )
+    replay_dia(linha)
+
+    st.subheader("🎯 Convergência da projeção", divider="gray")
+    # Chave só com valores estáveis: dia, granularidade e versão da linha do tempo.
+    versao = f"{linha.data.date()}:{linha.slot_minutos}:{linha.versao}"
+    plotly_chart(
+        fig_convergencia(versao, tema_atual(), linha.tabela()),
+        use_container_width=True,
+    )
+    st.caption(
+        "Projeção de fechamento registrada em cada horário, junto com a venda "
+        "acumulada. Quanto mais cedo a linha assenta perto do fechamento, mais "
+        "confiável foi a projeção do dia."
+    )
+
+
 # =========================================================
 # MAIN
 # =========================================================
-def main():
-    df_logins = load_logins(LOGINS_PATH)
+@st.cache_resource
+def versoes_figuras() -> dict:
+    """Última versão dos dados vista por granularidade, para o processo todo."""
+    return {"lock": threading.Lock(), "versoes": {}}
+
 
+def descartar_figuras(slot_minutos: int, versao: str):
+    """Esvazia os caches de figuras quando a versão dos dados avança.
+
+    As figuras ficam em cache por versão; sem isto, as de versões antigas
+    (em todos os temas, recortes e modelos) só sairiam pelo `max_entries`.
+    """
+    estado = versoes_figuras()
+    with estado["lock"]:
+        anterior = estado["versoes"].get(slot_minutos)
+        estado["versoes"][slot_minutos] = versao
+    if anterior is None or anterior == versao:
+        return
+    for cache in (
+        figuras_curvas_ritmo,
+        fig_leque,
+        fig_modelos,
+        fig_varredura,
+        fig_convergencia,
+    ):
+        cache.clear()
+
+
+def dados_painel(
+    filtro: dict | None, slot_minutos: int, modelo: str
+) -> tuple[dados.SnapshotDados, pd.DataFrame, dict]:
+    """Snapshot do recorte, projeções dos modelos e resumo com o modelo escolhido."""
+    snap = load_dados(
+        GRID_PATH, RESUMO_PATH, PEDIDOS_PATH, METAS_PATH, filtro, slot_minutos
+    )
+    modelos = load_modelos(
+        snap.versao,
+        dados.chave_filtro(filtro),
+        str(snap.resumo["data_referencia"]),
+        snap.grid,
+        snap.resumo,
+        snap.slot_minutos,
+    )
+    return snap, modelos, aplicar_modelo(snap.resumo, modelos, modelo)
+
+
+def main():
     if "auth" not in st.session_state:
         st.session_state["auth"] = False
 
     if not st.session_state["auth"]:
-        login_screen(df_logins)
+        login_screen(get_autenticador(LOGINS_PATH, dados.assinatura(LOGINS_PATH)))
         return
 
     inject_global_css()
@@ -770,19 +1931,141 @@ def main():
         unsafe_allow_html=True,
     )
 
-    grid, resumo = load_grid_and_resumo(GRID_PATH, RESUMO_PATH)
-
-    aba1, aba2, aba3 = st.tabs(["Visão Geral", "Curvas & Ritmo", "Simulação de Meta"])
+    slot_minutos = seletor_granularidade()
+    atualizador = get_atualizador(
+        GRID_PATH, RESUMO_PATH, PEDIDOS_PATH, METAS_PATH, slot_minutos
+    )
+    dimensoes = atualizador.dimensoes()
+    # Usuários com escopo (região, lojas, canal) só veem o próprio recorte; o
+    # recorte é calculado uma vez por escopo e versão, para todas as sessões.
+    escopo = valores_do_escopo(dimensoes, st.session_state.get("escopo", {}))
+    if escopo is None:
+        st.error(
+            "Seu usuário tem um recorte (região, loja ou canal) que estes dados "
+            "não permitem aplicar. Fale com o time de Dados."
+        )
+        return
+    filtro = seletor_filtro(dimensoes, escopo)
+
+    modelo = seletor_modelo()
+    kiosk = seletor_kiosk()
+    resumo_carga(atualizador.carregador.leituras, atualizador.carregador.divergencias)
+
+    versao_base = atualizador.versao
+    descartar_figuras(slot_minutos, versao_base)
+    snap, modelos, resumo = dados_painel(filtro, slot_minutos, modelo)
+    grid = snap.grid
+    # No modo CSV a granularidade é a do grid exportado, não a da barra lateral.
+    slot_minutos = snap.slot_minutos
+    # Figuras que dependem da projeção ficam em cache por versão + modelo.
+    versao = f"{snap.versao}:{modelo}"
+
+    if kiosk:
+        vigia_kiosk(atualizador, kiosk, versao_base)
+
+    historico = get_historico(slot_minutos)
+    datas_hist = historico.datas() if historico is not None else []
+    nomes_abas = ["Visão Geral", "Curvas & Ritmo", "Simulação de Meta"]
+    if len(datas_hist) > 1:
+        nomes_abas.append("Backtest")
+    # A linha do tempo é da visão consolidada: não aparece em recortes.
+    linha = atualizador.linha_tempo
+    if not (escopo or dados.chave_filtro(filtro)) and linha is not None and len(linha.slots()):
+        nomes_abas.append("Linha do tempo")
+    if st.session_state.get("user") in ADMINS:
+        nomes_abas.append("Desempenho")
+
+    # Abas com estado: só o painel da aba aberta roda (e é serializado) em
+    # cada rerun. `.open` é None quando a aba não rastreia estado; nesse caso
+    # todos os painéis rodam, como antes.
+    aba1, aba2, aba3, *extras = st.tabs(
+        nomes_abas,
+        key="aba_ativa",
+        on_change="rerun",
+    )
+    extras = dict(zip(nomes_abas[3:], extras))
 
     with aba1:
-        painel_visao_geral(grid, resumo, user_name)
+        if aba1.open is not False:
+            aberturas = {dim: atualizador.abertura(dim, filtro) for dim in dimensoes}
+            cenarios = load_cenarios(
+                snap.versao,
+                dados.chave_filtro(filtro),
+                str(resumo["data_referencia"]),
+                float(resumo["venda_atual_ate_slot"]),
+                len(grid) - 1,
+                float(resumo["meta_dia"]),
+                slot_minutos,
+            )
+            painel_visao_geral(
+                grid,
+                resumo,
+                user_name,
+                descricao_filtro(filtro),
+                aberturas,
+                cenarios,
+                versao,
+                modelos,
+            )
 
     with aba2:
-        painel_curvas_ritmo(grid, resumo)
+        if aba2.open is not False:
+            previsao = load_previsao(
+                versao,
+                dados.chave_filtro(filtro),
+                str(resumo["data_referencia"]),
+                float(resumo["venda_atual_ate_slot"]),
+                len(grid) - 1,
+                float(resumo["projecao_dia"]),
+                snap.frac_dia,
+                slot_minutos,
+            )
+            painel_curvas_ritmo(
+                grid, resumo, historico, filtro, versao, previsao
+            )
 
     with aba3:
-        painel_simulacao_meta(resumo)
+        if aba3.open is not False:
+            painel_simulacao_meta(resumo, versao)
+
+    if "Backtest" in extras:
+        aba4 = extras["Backtest"]
+        with aba4:
+            if aba4.open is not False:
+                datas_bt = tuple(str(d.date()) for d in datas_hist)
+                painel_backtest(
+                    load_backtest(
+                        historico.raiz,
+                        datas_bt,
+                        dados.chave_filtro(filtro),
+                        slot_minutos,
+                    )
+                )
+
+    if "Linha do tempo" in extras:
+        aba_lt = extras["Linha do tempo"]
+        with aba_lt:
+            if aba_lt.open is not False:
+                painel_linha_tempo(linha)
+
+    if "Desempenho" in extras:
+        aba_adm = extras["Desempenho"]
+        with aba_adm:
+            if aba_adm.open is not False:
+                painel_desempenho(atualizador)
+
+
+def executar():
+    """Roda o `main()` medindo o rerun e publica as métricas do processo."""
+    sessao = st.session_state.setdefault("id_sessao", uuid.uuid4().hex)
+    METRICAS.ver_sessao(sessao)
+    with METRICAS.medir("rerun"):
+        main()
+    try:
+        METRICAS.gravar_prometheus(METRICAS_PATH)
+    except OSError:
+        pass
 
 
 if __name__ == "__main__":
-    main()
+    executar()
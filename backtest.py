@@ -0,0 +1,78 @@
+"""Backtest da projeção intradia sobre dias históricos.
+
+Para cada dia e cada slot calcula a projeção que o painel teria mostrado
+naquele horário (`acumulado / frac_hist`), com o `frac_hist` montado pela
+mesma regra do painel (`projecao.curvas_referencia`: só os dias anteriores do
+mesmo mês), e compara com o fechamento real. Tudo sai de operações sobre a
+matriz dias × slots, sem laço por dia ou por slot.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def projecoes_historicas(curvas: np.ndarray, datas) -> dict:
+    """Projeção que teria sido mostrada em cada dia × slot e o erro relativo.
+
+    `datas` são os dias das linhas de `curvas`, em ordem. O `frac_hist` de
+    cada dia é a média das frações acumuladas dos dias anteriores com venda
+    do mesmo mês (somas via `cumsum` no eixo dos dias, recomeçando a janela
+    na virada do mês). O primeiro dia de cada mês, sem histórico, fica NaN.
+    """
+    curvas = np.asarray(curvas, dtype=float)
+    datas = pd.DatetimeIndex(datas)
+    if len(datas) != len(curvas):
+        raise ValueError("Uma data por linha de `curvas`.")
+    totais = curvas.sum(axis=1)
+    validos = totais > 0
+    acum = np.cumsum(curvas, axis=1)
+
+    frac_dia = np.zeros_like(acum)
+    frac_dia[validos] = acum[validos] / totais[validos, None]
+
+    # Somas das frações (e da contagem de dias) do início do mês até a véspera.
+    soma = np.vstack([np.zeros((1, curvas.shape[1])), np.cumsum(frac_dia, axis=0)])
+    conta = np.concatenate([[0], np.cumsum(validos)])
+    fim = np.arange(len(curvas))
+    mes = datas.year.to_numpy() * 12 + datas.month.to_numpy()
+    virada = np.r_[True, mes[1:] != mes[:-1]]
+    inicio = np.maximum.accumulate(np.where(virada, fim, 0))
+    n = (conta[fim] - conta[inicio])[:, None]
+    frac_hist = np.divide(
+        soma[fim] - soma[inicio],
+        n,
+        out=np.full_like(acum, np.nan),
+        where=n > 0,
+    )
+
+    projecao = np.divide(acum, frac_hist, out=np.full_like(acum, np.nan), where=frac_hist > 0)
+    erro = np.divide(
+        projecao,
+        totais[:, None],
+        out=np.full_like(acum, np.nan),
+        where=validos[:, None],
+    ) - 1
+    return {"projecao": projecao, "erro": erro, "fechamento": totais}
+
+
+def erro_por_slot(erro: np.ndarray, slots) -> pd.DataFrame:
+    """MAPE e viés (erro médio) da projeção em cada slot.
+
+    Slots sem nenhum dia com erro definido ficam NaN. As médias são feitas
+    com soma e contagem: `np.nanmean` avisaria "Mean of empty slice" nesses
+    slots.
+    """
+    dias = np.sum(~np.isnan(erro), axis=0)
+    sem_dias = dias == 0
+    n = np.maximum(dias, 1)
+    mape = np.where(sem_dias, np.nan, np.nansum(np.abs(erro), axis=0) / n)
+    vies = np.where(sem_dias, np.nan, np.nansum(erro, axis=0) / n)
+    return pd.DataFrame(
+        {
+            "SLOT": slots,
+            "mape": mape,
+            "vies": vies,
+            "dias": dias,
+        }
+    )
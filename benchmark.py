@@ -0,0 +1,307 @@
+"""Benchmark do painel com dados sintéticos.
+
+Gera `saida_grid.csv` / `saida_resumo.csv` (e o histórico em Parquet) numa
+escala configurável de slots, dias e lojas, e mede a carga dos arquivos, as
+contas de projeção e ritmo, o `melt`/`pivot` do mapa de calor e reruns
+completos do `main()` pelo AppTest do Streamlit. O resultado sai em JSON
+para comparar uma execução com outra:
+
+    python benchmark.py --slot-minutos 5 --dias 60 --lojas 200 --saida bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import acesso
+import backtest as bt
+import cenarios as cen
+import dados
+import historico as hist
+import projecao
+
+APP_PATH = Path(__file__).resolve().parent / "app.py"
+USUARIO_BENCH = "bench"
+ABAS = ["Visão Geral", "Curvas & Ritmo", "Simulação de Meta", "Backtest"]
+
+
+# =========================================================
+# DADOS SINTÉTICOS
+# =========================================================
+def gerar_curvas(
+    dias: int,
+    lojas: int,
+    slot_minutos: int = projecao.SLOT_MINUTOS,
+    seed: int = 0,
+) -> np.ndarray:
+    """Vendas por dia × loja × slot, com forma intradia e ruído realistas."""
+    rng = np.random.default_rng(seed)
+    s = projecao.n_slots(slot_minutos)
+    hora = np.arange(s) * slot_minutos / 60
+    # Dois picos (almoço e noite) sobre uma base baixa de madrugada.
+    forma = 0.2 + np.exp(-((hora - 12.5) ** 2) / 6) + 1.3 * np.exp(-((hora - 20.5) ** 2) / 5)
+    forma /= forma.sum()
+    total_loja = rng.lognormal(mean=10, sigma=0.6, size=lojas)
+    fator_dia = rng.normal(1.0, 0.08, size=dias)
+    ruido = rng.gamma(shape=20, scale=1 / 20, size=(dias, lojas, s))
+    return fator_dia[:, None, None] * total_loja[None, :, None] * forma * ruido
+
+
+def gerar_saidas(
+    curvas: np.ndarray,
+    datas: pd.DatetimeIndex,
+    slot_atual: int,
+    slot_minutos: int = projecao.SLOT_MINUTOS,
+) -> tuple[pd.DataFrame, dict]:
+    """Grid e resumo consolidados do último dia, como os CSVs exportados."""
+    consolidado = curvas.sum(axis=1)
+    ref = datas[-1]
+    ref_curvas = projecao.curvas_referencia(datas, consolidado, ref)
+    metas = {d: float(v) * 1.05 for d, v in zip(datas, consolidado.sum(axis=1))}
+    return projecao.montar_dia(ref_curvas, ref, slot_atual, metas, slot_minutos)
+
+
+def gerar_cenario(
+    destino: Path,
+    dias: int,
+    lojas: int,
+    slot_minutos: int = projecao.SLOT_MINUTOS,
+    seed: int = 0,
+    com_historico: bool = True,
+) -> dict:
+    """Grava `data/` sintético em `destino` e devolve o tamanho de cada parte."""
+    data_dir = destino / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    curvas = gerar_curvas(dias, lojas, slot_minutos, seed)
+    datas = pd.date_range(end=pd.Timestamp("2025-11-28"), periods=dias, freq="D")
+    slot_atual = projecao.n_slots(slot_minutos) * 14 // 24
+
+    grid, resumo = gerar_saidas(curvas, datas, slot_atual, slot_minutos)
+    grid.to_csv(data_dir / "saida_grid.csv", index=False)
+    pd.DataFrame([resumo]).to_csv(data_dir / "saida_resumo.csv", index=False)
+    pd.DataFrame(
+        [{"usuario": USUARIO_BENCH, "nome": "Benchmark", "senha_hash": acesso.hash_senha("bench")}]
+    ).to_csv(data_dir / "logins.csv", index=False)
+
+    if com_historico:
+        # Histórico por loja: um arquivo por dia, agregado por loja e slot.
+        historico = hist.HistoricoVendas(data_dir / "historico", slot_minutos)
+        s = curvas.shape[2]
+        for data, dia in zip(datas[:-1], curvas[:-1]):
+            historico.gravar_dia(
+                data,
+                pd.DataFrame(
+                    {
+                        "slot": np.tile(np.arange(s), lojas),
+                        "valor": dia.ravel(),
+                        "loja": np.repeat(np.arange(lojas), s),
+                    }
+                ),
+            )
+    return {"dias": dias, "lojas": lojas, "slots": curvas.shape[2], "linhas_grid": len(grid)}
+
+
+# =========================================================
+# MEDIÇÃO
+# =========================================================
+def medir(funcao, repeticoes: int) -> dict:
+    """Tempos (segundos) de `repeticoes` chamadas de `funcao`."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return estatisticas(tempos)
+
+
+def estatisticas(tempos: list[float]) -> dict:
+    t = np.asarray(tempos)
+    return {
+        "n": len(t),
+        "min": float(t.min()),
+        "mediana": float(np.median(t)),
+        "p95": float(np.percentile(t, 95)),
+        "media": float(t.mean()),
+    }
+
+
+@contextmanager
+def diretorio(caminho: Path):
+    anterior = os.getcwd()
+    os.chdir(caminho)
+    try:
+        yield
+    finally:
+        os.chdir(anterior)
+
+
+def bench_carga(data_dir: Path, repeticoes: int) -> dict:
+    grid_path, resumo_path = data_dir / "saida_grid.csv", data_dir / "saida_resumo.csv"
+    return {
+        # Leitura do zero, como na primeira sessão ou quando o CSV muda.
+        "carga_csv": medir(
+            lambda: dados.CarregadorDados(grid_path, resumo_path).carregar(), repeticoes
+        ),
+        "ler_grid": medir(lambda: dados.ler_grid(grid_path), repeticoes),
+        "ler_grid_float32": medir(lambda: dados.ler_grid(grid_path, compacto=True), repeticoes),
+    }
+
+
+def bench_calculo(data_dir: Path, curvas: np.ndarray, repeticoes: int) -> dict:
+    grid = dados.ler_grid(data_dir / "saida_grid.csv")
+    resumo = dados.ler_resumo(data_dir / "saida_resumo.csv")
+    consolidado = curvas.sum(axis=1)
+    datas = pd.date_range(end="2025-11-28", periods=len(curvas), freq="D")
+    janela = projecao.JANELA_RECENCIA_DIAS
+    base = projecao.BaseProjecao.de_grid(grid, resumo, consolidado[-janela:], datas[-janela:])
+
+    def projecao_ritmo():
+        derivado = projecao.derivar_grid(
+            grid["valor_hoje"],
+            grid["valor_d1"],
+            grid["valor_d7"],
+            grid["valor_media_mes"],
+            grid["frac_hist"],
+            slots=grid["SLOT"].to_numpy(),
+        )
+        projecao.derivar_resumo(
+            derivado,
+            resumo["data_referencia"],
+            resumo["meta_dia"],
+            resumo["total_d1"],
+            resumo["meta_d1"],
+            resumo["total_d7"],
+            resumo["meta_d7"],
+        )
+
+    def heat_melt_pivot():
+        # Mesmo caminho de `build_fig_heat` antes do Plotly.
+        df_heat = pd.DataFrame(
+            {
+                "SLOT": grid["SLOT"],
+                "Hoje": grid["valor_hoje"],
+                "D-1": grid["valor_d1"],
+                "D-7": grid["valor_d7"],
+                "Média do mês": grid["valor_media_mes"],
+            }
+        )
+        df_melt = df_heat.melt(id_vars="SLOT", var_name="Dia", value_name="Valor")
+        df_melt.pivot(index="Dia", columns="SLOT", values="Valor")
+
+    return {
+        "projecao_ritmo": medir(projecao_ritmo, repeticoes),
+        "modelos": medir(lambda: projecao.projetar_modelos(base), repeticoes),
+        "heat_melt_pivot": medir(heat_melt_pivot, repeticoes),
+        "curvas_referencia_lojas": medir(
+            lambda: projecao.curvas_referencia(
+                datas,
+                curvas.sum(axis=1),
+                "2025-11-28",
+            ),
+            repeticoes,
+        ),
+        "backtest": medir(
+            lambda: bt.projecoes_historicas(consolidado[:-1], datas[:-1]), repeticoes
+        ),
+        "cenarios": medir(
+            lambda: cen.simular_fechamento(
+                consolidado[:-1],
+                float(resumo["venda_atual_ate_slot"]),
+                len(grid) - 1,
+                float(resumo["meta_dia"]),
+            ),
+            repeticoes,
+        ),
+    }
+
+
+def bench_app(destino: Path, repeticoes: int) -> dict:
+    """Primeira execução e reruns de cada aba do `main()` pelo AppTest."""
+    from streamlit.testing.v1 import AppTest
+
+    resultado = {}
+    with diretorio(destino):
+        at = AppTest.from_file(str(APP_PATH), default_timeout=300)
+        at.session_state["auth"] = True
+        at.session_state["user"] = USUARIO_BENCH
+        at.session_state["user_name"] = "Benchmark"
+        inicio = time.perf_counter()
+        at.run()
+        resultado["app_primeira_execucao"] = estatisticas([time.perf_counter() - inicio])
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+        for aba in ABAS:
+            at.session_state["aba_ativa"] = aba
+            at.run()  # troca de aba: monta os caches da aba
+
+            def rerun():
+                at.run()
+                if at.exception:
+                    raise RuntimeError(at.exception[0].value)
+
+            resultado[f"app_rerun[{aba}]"] = medir(rerun, repeticoes)
+    return resultado
+
+
+def ambiente() -> dict:
+    import streamlit
+
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "streamlit": streamlit.__version__,
+    }
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slot-minutos", type=int, default=projecao.SLOT_MINUTOS)
+    parser.add_argument("--dias", type=int, default=60)
+    parser.add_argument("--lojas", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sem-app", action="store_true", help="não roda o AppTest")
+    parser.add_argument("--saida", type=Path, help="arquivo JSON (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench-painel-") as tmp:
+        destino = Path(tmp)
+        inicio = time.perf_counter()
+        escala = gerar_cenario(destino, args.dias, args.lojas, args.slot_minutos, args.seed)
+        geracao = time.perf_counter() - inicio
+        curvas = gerar_curvas(args.dias, args.lojas, args.slot_minutos, args.seed)
+
+        resultados = {}
+        resultados.update(bench_carga(destino / "data", args.repeticoes))
+        resultados.update(bench_calculo(destino / "data", curvas, args.repeticoes))
+        if not args.sem_app:
+            resultados.update(bench_app(destino, args.repeticoes))
+
+    saida = {
+        "parametros": {**vars(args), "saida": str(args.saida) if args.saida else None},
+        "escala": {**escala, "segundos_geracao": geracao},
+        "ambiente": ambiente(),
+        "resultados": resultados,
+    }
+    texto = json.dumps(saida, indent=2, ensure_ascii=False)
+    if args.saida:
+        args.saida.write_text(texto, encoding="utf-8")
+    else:
+        print(texto)
+    return saida
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Faixa de fechamento da projeção a partir das curvas históricas.
+
+Cada dia histórico é um cenário e usa a curva de participação dele inteira:
+os slots de um mesmo dia andam juntos (um dia adiantado fica adiantado o dia
+todo), e é essa correlação que dá a largura da faixa. Com a curva acumulada
+de cada dia, a venda atual é projetada para o fechamento do mesmo jeito que
+a projeção pontual (`venda_atual / frac`). Sortear dias com reposição não
+criaria cenários novos, só ruído em volta desses mesmos N valores, então os
+percentis e a chance de meta saem direto da distribuição empírica, numa
+única matriz dias × slots.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+PERCENTIS = (10, 50, 90)
+
+
+def percentis_por_coluna(matriz: np.ndarray, percentis=PERCENTIS) -> np.ndarray:
+    """Percentis (interpolação linear) de cada coluna, via uma ordenação só.
+
+    Equivale a `np.percentile(matriz, percentis, axis=0)`, mas ordenar a
+    matriz inteira é bem mais rápido que as partições por percentil.
+    """
+    ordenada = np.sort(matriz, axis=0)
+    pos = np.asarray(percentis, dtype=float) / 100 * (len(ordenada) - 1)
+    baixo = np.floor(pos).astype(int)
+    alto = np.minimum(baixo + 1, len(ordenada) - 1)
+    peso = (pos - baixo)[:, None]
+    return ordenada[baixo] * (1 - peso) + ordenada[alto] * peso
+
+
+def participacoes(curvas: np.ndarray) -> np.ndarray:
+    """Participação de cada slot no total do dia, só para dias com venda."""
+    curvas = np.asarray(curvas, dtype=float)
+    totais = curvas.sum(axis=1)
+    validos = totais > 0
+    return curvas[validos] / totais[validos, None]
+
+
+def simular_fechamento(
+    curvas: np.ndarray,
+    venda_atual: float,
+    slot_atual: int,
+    meta_dia: float,
+) -> dict:
+    """Distribuição do fechamento do dia a partir de `curvas` (dias × slots).
+
+    Devolve P10/P50/P90 do fechamento, a probabilidade de bater `meta_dia`
+    e o leque (P10/P50/P90 por slot) do acumulado projetado.
+    """
+    partes = participacoes(curvas)
+    if len(partes) == 0:
+        raise ValueError("Sem dias históricos com venda para simular.")
+    frac = np.cumsum(partes, axis=1)
+    frac /= frac[:, -1:]
+
+    # Dias sem venda histórica até o slot atual não projetam nada.
+    frac_atual = frac[:, slot_atual]
+    validos = frac_atual > 0
+    if not validos.any():
+        raise ValueError("Nenhum dia histórico com venda até o slot atual.")
+    frac = frac[validos]
+    fechamento = venda_atual / frac_atual[validos]
+    # Cada cenário passa pela venda atual no slot corrente.
+    acumulado = fechamento[:, None] * frac
+
+    p10, p50, p90 = np.percentile(fechamento, PERCENTIS)
+    leque = percentis_por_coluna(acumulado)
+    return {
+        "p10": float(p10),
+        "p50": float(p50),
+        "p90": float(p90),
+        "prob_meta": float(np.mean(fechamento >= meta_dia)) if meta_dia > 0 else np.nan,
+        "leque": leque,
+        "n_dias": int(validos.sum()),
+    }
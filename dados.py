@@ -0,0 +1,751 @@
+"""Carregamento versionado do grid e do resumo.
+
+O carregador guarda, para cada arquivo de entrada, a assinatura (mtime e
+tamanho) da última leitura. A cada chamada só os arquivos cuja assinatura
+mudou são lidos de novo, e o par grid/resumo é trocado de uma vez por um
+novo `SnapshotDados`, identificado por uma versão curta.
+
+Os CSVs são lidos com o motor CSV do pyarrow e tipos declarados (sem
+inferência): valores em float64, ou float32 no modo compacto, e o `SLOT`
+convertido no índice inteiro `minuto` (minuto do dia). Tempo de leitura e
+memória ocupada de cada arquivo ficam em `CarregadorDados.leituras`.
+
+Do grid e do resumo bastam as colunas brutas (`projecao.COLUNAS_GRID_BRUTAS`
+e `COLUNAS_RESUMO_BRUTAS`): acumulados, ritmos, desvios e textos são sempre
+recalculados na carga. Se o CSV também trouxer as colunas derivadas, elas
+são comparadas com o recálculo e as divergências ficam em
+`CarregadorDados.divergencias`.
+
+Com um log de pedidos só de acréscimo (`fluxo_path`), cada carga lê apenas
+as linhas novas (`fluxo.SeguidorPedidos`) e soma esses pedidos num
+`projecao.AcumuladorSlots` do dia: o custo de uma atualização acompanha os
+pedidos novos, não o tamanho do log.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import fluxo
+import projecao
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SnapshotDados:
+    """Versão imutável dos dados do painel.
+
+    O grid é compartilhado entre sessões: quem precisar alterá-lo deve
+    trabalhar sobre uma cópia. `frac_dia` é a fração acumulada histórica do
+    dia inteiro (um valor por slot), usada na previsão do resto do dia; só
+    existe quando os dados vêm dos pedidos. `slot_minutos` é a granularidade
+    do grid: a do carregador, ou a do grid exportado no modo CSV.
+    """
+
+    grid: pd.DataFrame
+    resumo: dict
+    versao: str
+    frac_dia: np.ndarray | None = None
+    slot_minutos: int = projecao.SLOT_MINUTOS
+
+
+def assinatura(path: Path | None) -> tuple | None:
+    """(mtime_ns, tamanho) do arquivo, ou None se ele não existir."""
+    if path is None:
+        return None
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+TEXTO_RESUMO = [
+    "data_referencia",
+    "tipo_percentual_base",
+    "explicacao_ritmo",
+    "explicacao_d1",
+    "explicacao_d7",
+]
+
+TIPOS_PEDIDOS = {"valor": "float64", "canal": "category", "regiao": "category"}
+# Recortes filtrados mantidos em memória no modo log (além do consolidado).
+MAX_RECORTES_FLUXO = 64
+
+
+def tipos_grid(compacto: bool = False) -> dict[str, str]:
+    """Tipos declarados das colunas do grid (float32 no modo compacto)."""
+    real = "float32" if compacto else "float64"
+    return {c: "string" if c == "SLOT" else real for c in projecao.COLUNAS_GRID}
+
+
+def tipos_resumo() -> dict[str, str]:
+    return {c: "string" if c in TEXTO_RESUMO else "float64" for c in projecao.COLUNAS_RESUMO}
+
+
+def memoria(conteudo) -> int:
+    """Bytes ocupados por um DataFrame (ou pelos valores de um dict)."""
+    if isinstance(conteudo, pd.DataFrame):
+        return int(conteudo.memory_usage(deep=True).sum())
+    return int(pd.Series(conteudo, dtype=object).memory_usage(deep=True))
+
+
+def ler_grid(path: Path, compacto: bool = False) -> pd.DataFrame:
+    grid = pd.read_csv(path, engine="pyarrow", dtype=tipos_grid(compacto))
+    # O pyarrow reconhece "HH:MM" como horário e devolve "HH:MM:SS".
+    grid["SLOT"] = grid["SLOT"].str.slice(0, 5)
+    grid.index = pd.Index(projecao.minuto_do_dia(grid["SLOT"]), name="minuto")
+    return grid
+
+
+def ler_resumo(path: Path) -> dict:
+    resumo = pd.read_csv(path, engine="pyarrow", dtype=tipos_resumo())
+    return {k: (str(v) if k in TEXTO_RESUMO else v) for k, v in resumo.iloc[0].items()}
+
+
+def derivar_saidas(
+    grid: pd.DataFrame, resumo: dict
+) -> tuple[pd.DataFrame, dict, dict[str, int]]:
+    """Grid e resumo recalculados das colunas brutas, e as divergências.
+
+    As divergências contam, por coluna, quantos valores enviados no CSV
+    diferem do recálculo (tolerância relativa de 1e-6); colunas derivadas
+    ausentes do CSV não entram na conta.
+    """
+    derivado = projecao.derivar_grid(
+        grid["valor_hoje"],
+        grid["valor_d1"],
+        grid["valor_d7"],
+        grid["valor_media_mes"],
+        grid["frac_hist"],
+        slots=grid["SLOT"].to_numpy(),
+    )
+    resumo_derivado = projecao.derivar_resumo(
+        derivado,
+        resumo["data_referencia"],
+        meta_dia=float(resumo["meta_dia"]),
+        total_d1=float(resumo["total_d1"]),
+        meta_d1=float(resumo["meta_d1"]),
+        total_d7=float(resumo["total_d7"]),
+        meta_d7=float(resumo["meta_d7"]),
+    )
+
+    divergencias = {}
+    colunas = [c for c in projecao.COLUNAS_GRID if c in grid.columns and c != "SLOT"]
+    if colunas:
+        enviado = grid[colunas].to_numpy(dtype=float)
+        calculado = derivado[colunas].to_numpy(dtype=float)
+        difere = ~np.isclose(enviado, calculado, rtol=1e-6, equal_nan=True)
+        divergencias.update(
+            {c: int(n) for c, n in zip(colunas, difere.sum(axis=0)) if n}
+        )
+    numericos = [
+        c for c in projecao.COLUNAS_RESUMO
+        if c in resumo and c not in TEXTO_RESUMO
+    ]
+    if numericos:
+        enviado = np.array([float(resumo[c]) for c in numericos])
+        calculado = np.array([float(resumo_derivado[c]) for c in numericos])
+        difere = ~np.isclose(enviado, calculado, rtol=1e-6, equal_nan=True)
+        divergencias.update({f"resumo.{c}": 1 for c, d in zip(numericos, difere) if d})
+
+    return derivado, resumo_derivado, divergencias
+
+
+def gravar_entrada_bruta(
+    grid: pd.DataFrame, resumo: dict, grid_path: Path, resumo_path: Path
+):
+    """Grava só as colunas brutas do grid e do resumo (o resto é derivado na carga)."""
+    grid[projecao.COLUNAS_GRID_BRUTAS].to_csv(grid_path, index=False)
+    pd.DataFrame([{c: resumo[c] for c in projecao.COLUNAS_RESUMO_BRUTAS}]).to_csv(
+        resumo_path, index=False
+    )
+
+
+def ler_pedidos(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, engine="pyarrow", dtype=TIPOS_PEDIDOS)
+
+
+def ler_metas(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, parse_dates=["data"])
+
+
+def metas_para(metas: pd.DataFrame | None, filtro: dict | None = None) -> dict:
+    """Meta por data, somando as linhas que casam com o filtro.
+
+    O arquivo de metas pode ter colunas de dimensão (canal, região, loja).
+    Se o filtro usa uma dimensão que o arquivo não tem, a meta do recorte é
+    desconhecida: todas as datas saem como NaN (nunca a meta consolidada), e
+    o painel esconde os cards que dependem dela.
+    """
+    if metas is None:
+        return {}
+    por_data = projecao.filtrar_pedidos(metas, filtro).groupby("data")["meta"].sum()
+    if any(v and chave not in metas.columns for chave, v in (filtro or {}).items()):
+        return dict.fromkeys(por_data.index, np.nan)
+    return por_data.to_dict()
+
+
+def chave_filtro(filtro: dict | None) -> tuple:
+    """Forma canônica (e hasheável) de um filtro de dimensões."""
+    if not filtro:
+        return ()
+    return tuple(sorted((k, tuple(sorted(v))) for k, v in filtro.items() if v))
+
+
+class CarregadorDados:
+    """Lê grid e resumo (ou pedidos e metas) só quando os arquivos mudam."""
+
+    def __init__(
+        self,
+        grid_path: Path,
+        resumo_path: Path,
+        pedidos_path: Path | None = None,
+        metas_path: Path | None = None,
+        historico=None,
+        slot_minutos: int = projecao.SLOT_MINUTOS,
+        compacto: bool = False,
+        fluxo_path: Path | None = None,
+    ):
+        self.grid_path = grid_path
+        self.resumo_path = resumo_path
+        self.pedidos_path = pedidos_path
+        self.metas_path = metas_path
+        self.historico = historico
+        self.slot_minutos = slot_minutos
+        self.compacto = compacto
+
+        self._arquivos: dict[Path, tuple] = {}
+        # Última leitura de cada arquivo: linhas, segundos e bytes em memória.
+        self.leituras: dict[str, dict] = {}
+        # Colunas derivadas do CSV que não batem com o recálculo (coluna → valores).
+        self.divergencias: dict[str, int] = {}
+        # (snapshot, entradas brutas) publicados juntos numa única atribuição:
+        # quem lê um recorte nunca mistura o snapshot de uma versão com os
+        # pedidos de outra.
+        self._estado: tuple[SnapshotDados, tuple | None] | None = None
+        self._chave: tuple | None = None
+        self._indice: tuple | None = None
+        self._lock = threading.Lock()
+
+        # Modo log: estado incremental do dia, alimentado só pelos pedidos novos.
+        self.fluxo_path = fluxo_path
+        self._seguidor = (
+            fluxo.SeguidorPedidos(fluxo_path, TIPOS_PEDIDOS) if fluxo_path is not None else None
+        )
+        self._base_fluxo: tuple | None = None
+        self._lotes: list[pd.DataFrame] = []   # só pedidos do dia corrente
+        self._ultimo: pd.Timestamp | None = None
+        self._valores_fluxo: dict[str, set] = {}
+        # Chave do filtro → (acumulador, abertura por dimensão); `()` é o consolidado.
+        self._recortes_fluxo: dict[tuple, tuple] = {}
+        self._ref_fluxo: pd.Timestamp | None = None
+
+    @property
+    def snapshot(self) -> SnapshotDados | None:
+        estado = self._estado
+        return estado[0] if estado is not None else None
+
+    @property
+    def versao(self) -> str | None:
+        snap = self.snapshot
+        return snap.versao if snap is not None else None
+
+    def _ler(self, path: Path, leitor, assin: tuple):
+        """Devolve o conteúdo do arquivo, relendo só se a assinatura mudou."""
+        atual = self._arquivos.get(path)
+        if atual is not None and atual[0] == assin:
+            return atual[1]
+        inicio = time.perf_counter()
+        conteudo = leitor(path)
+        self.leituras[path.name] = {
+            "linhas": len(conteudo) if isinstance(conteudo, pd.DataFrame) else 1,
+            "segundos": time.perf_counter() - inicio,
+            "bytes": memoria(conteudo),
+        }
+        self._arquivos[path] = (assin, conteudo)
+        return conteudo
+
+    def _assinaturas(self) -> tuple:
+        log = assinatura(self.fluxo_path)
+        if log is not None and log[1] > 0:
+            return (
+                ("fluxo", log),
+                ("pedidos", assinatura(self.pedidos_path)),
+                ("metas", assinatura(self.metas_path)),
+            )
+        if assinatura(self.pedidos_path) is not None:
+            return (
+                ("pedidos", assinatura(self.pedidos_path)),
+                ("metas", assinatura(self.metas_path)),
+            )
+        return (
+            ("grid", assinatura(self.grid_path)),
+            ("resumo", assinatura(self.resumo_path)),
+        )
+
+    def _montar(self, chave: tuple) -> tuple[pd.DataFrame, dict, np.ndarray | None, tuple | None]:
+        """Devolve grid, resumo, `frac_dia` e as entradas brutas (pedidos, metas)."""
+        assin = dict(chave)
+        if "fluxo" in assin:
+            return self._montar_fluxo(assin)
+        if "pedidos" in assin:
+            pedidos = self._ler(self.pedidos_path, ler_pedidos, assin["pedidos"])
+            if pedidos.empty:
+                raise ValueError(f"{self.pedidos_path.name} sem pedidos.")
+            metas = None
+            if assin["metas"] is not None:
+                metas = self._ler(self.metas_path, ler_metas, assin["metas"])
+            ref, slot_atual, curvas = projecao.curvas_pedidos(
+                pedidos, historico=self.historico, slot_minutos=self.slot_minutos
+            )
+            grid, resumo = projecao.montar_dia(
+                curvas, ref, slot_atual, metas_para(metas), self.slot_minutos
+            )
+            return grid, resumo, curvas["frac_hist"], (pedidos, metas)
+
+        grid = self._ler(
+            self.grid_path, lambda p: ler_grid(p, self.compacto), assin["grid"]
+        )
+        resumo = self._ler(self.resumo_path, ler_resumo, assin["resumo"])
+        grid, resumo, self.divergencias = derivar_saidas(grid, resumo)
+        if self.compacto:
+            grid = grid.astype({c: "float32" for c in grid.columns if c != "SLOT"})
+        return grid, resumo, None, None
+
+    # -----------------------------------------------------
+    # Log de pedidos só de acréscimo
+    # -----------------------------------------------------
+    def _montar_fluxo(self, assin: dict) -> tuple[pd.DataFrame, dict, np.ndarray, tuple]:
+        """Soma os pedidos novos do log nos acumuladores do dia e monta grid e resumo."""
+        base = (assin["pedidos"], assin["metas"])
+        pedidos_base = metas = None
+        if assin["pedidos"] is not None:
+            pedidos_base = self._ler(self.pedidos_path, ler_pedidos, assin["pedidos"])
+        if assin["metas"] is not None:
+            metas = self._ler(self.metas_path, ler_metas, assin["metas"])
+        if base != self._base_fluxo:
+            # Pedidos ou metas de base mudaram: referências do dia recalculadas.
+            self._base_fluxo = base
+            self._recortes_fluxo = {}
+            self._valores_fluxo = {}
+            if pedidos_base is not None:
+                self._registrar_valores(pedidos_base)
+                if self._ultimo is None and len(pedidos_base):
+                    self._ultimo = pd.Timestamp(pedidos_base["timestamp"].max())
+
+        inicio = time.perf_counter()
+        novos = self._seguidor.ler_novos()
+        self.leituras[self.fluxo_path.name] = {
+            "linhas": len(novos),
+            "segundos": time.perf_counter() - inicio,
+            "bytes": memoria(novos),
+        }
+        if len(novos):
+            self._registrar_valores(novos)
+            ultimo = pd.Timestamp(novos["timestamp"].max())
+            if self._ultimo is None or ultimo > self._ultimo:
+                self._ultimo = ultimo
+        if self._ultimo is None:
+            raise ValueError("Log de pedidos ainda sem nenhuma linha completa.")
+
+        ref = self._ultimo.normalize()
+        novos = novos[(novos["timestamp"] >= ref).to_numpy()]
+        if ref != self._ref_fluxo:
+            # Virada do dia: lotes de dias anteriores não servem a nenhum recorte.
+            self._ref_fluxo = ref
+            self._recortes_fluxo = {}
+            self._lotes = [lote[(lote["timestamp"] >= ref).to_numpy()] for lote in self._lotes]
+            self._lotes = [lote for lote in self._lotes if len(lote)]
+        for chave, recorte in self._recortes_fluxo.items():
+            self._alimentar(recorte, chave, novos)
+            recorte[0].avancar(self._slot_fluxo())
+        if len(novos):
+            self._lotes.append(novos)
+        acum, _ = self._recorte_fluxo(())
+
+        # Cópias: o acumulador continua mudando depois que o snapshot é publicado.
+        curvas = self._curvas_fluxo(acum)
+        grid, resumo = projecao.montar_dia(
+            curvas, ref, acum.slot_atual, metas_para(metas), self.slot_minutos
+        )
+        return grid, resumo, curvas["frac_hist"], (None, metas)
+
+    def _recorte_fluxo(self, chave: tuple) -> tuple:
+        """(acumulador, abertura) do recorte `chave`, criado na primeira vez que é pedido.
+
+        Um recorte novo parte das referências do filtro e soma só os lotes
+        do dia; depois disso cada versão nova o alimenta só com os pedidos
+        novos. Chamado com `_lock` já adquirido.
+        """
+        recorte = self._recortes_fluxo.get(chave)
+        if recorte is not None:
+            return recorte
+        if len(self._recortes_fluxo) >= MAX_RECORTES_FLUXO:
+            # Descarta o recorte filtrado mais antigo; o consolidado fica.
+            antigo = next(k for k in self._recortes_fluxo if k)
+            del self._recortes_fluxo[antigo]
+        pedidos_base = None
+        if self._base_fluxo and self._base_fluxo[0] is not None:
+            pedidos_base = projecao.filtrar_pedidos(
+                self._arquivos[self.pedidos_path][1], dict(chave)
+            )
+        recorte = (
+            projecao.AcumuladorSlots.de_curvas(
+                self._referencias_fluxo(self._ref_fluxo, pedidos_base, dict(chave)),
+                self.slot_minutos,
+            ),
+            {},
+        )
+        if len(self._lotes) > 1:
+            # Compacta os lotes do dia: o próximo recorte novo parte deste.
+            self._lotes = [fluxo.concatenar_pedidos(self._lotes)]
+        for lote in self._lotes:
+            self._alimentar(recorte, chave, lote)
+        recorte[0].avancar(self._slot_fluxo())
+        self._recortes_fluxo[chave] = recorte
+        return recorte
+
+    def _alimentar(self, recorte: tuple, chave: tuple, lote: pd.DataFrame):
+        """Soma o lote (só as linhas do filtro) no acumulador e na abertura do recorte."""
+        acum, abertura = recorte
+        lote = projecao.filtrar_pedidos(lote, dict(chave))
+        if len(lote):
+            ts = pd.DatetimeIndex(lote["timestamp"])
+            acum.adicionar_lote(
+                (ts.hour * 60 + ts.minute).to_numpy() // self.slot_minutos, lote["valor"]
+            )
+        for dimensao in projecao.DIMENSOES:
+            if dimensao not in lote.columns or not len(lote):
+                continue
+            soma = projecao.abertura(lote, dimensao)
+            soma.index = soma.index.astype(object)
+            atual = abertura.get(dimensao)
+            abertura[dimensao] = soma if atual is None else atual.add(soma, fill_value=0)
+
+    def _slot_fluxo(self) -> int:
+        return (self._ultimo.hour * 60 + self._ultimo.minute) // self.slot_minutos
+
+    @staticmethod
+    def _curvas_fluxo(acum: projecao.AcumuladorSlots) -> dict[str, np.ndarray]:
+        return {
+            "valor_hoje": acum.valor_hoje.copy(),
+            "valor_d1": acum.valor_d1.copy(),
+            "valor_d7": acum.valor_d7.copy(),
+            "valor_media_mes": acum.valor_media_mes.copy(),
+            "frac_hist": acum.frac_hist.copy(),
+        }
+
+    def _referencias_fluxo(
+        self, ref: pd.Timestamp, pedidos_base: pd.DataFrame | None, filtro: dict | None = None
+    ) -> dict:
+        """D-1, D-7, média do mês e `frac_hist` do dia `ref` (no recorte do filtro)."""
+        if self.historico is not None:
+            return self.historico.referencias(ref, filtro or None)
+        if pedidos_base is not None and len(pedidos_base):
+            datas, matriz = projecao.agregar_pedidos(
+                pedidos_base["timestamp"], pedidos_base["valor"], self.slot_minutos
+            )
+            return projecao.curvas_referencia(datas, matriz, ref)
+        vazio = np.zeros(projecao.n_slots(self.slot_minutos))
+        return {c: vazio for c in ("valor_d1", "valor_d7", "valor_media_mes", "frac_hist")}
+
+    def _registrar_valores(self, pedidos: pd.DataFrame):
+        for chave in projecao.DIMENSOES:
+            if chave in pedidos.columns:
+                self._valores_fluxo.setdefault(chave, set()).update(
+                    pedidos[chave].dropna().unique().tolist()
+                )
+
+    def carregar(self) -> SnapshotDados:
+        """Devolve o snapshot atual, recarregando só o que mudou em disco."""
+        chave = self._assinaturas()
+        snap = self.snapshot
+        if snap is not None and chave == self._chave:
+            return snap
+
+        with self._lock:
+            if self._estado is not None and chave == self._chave:
+                return self._estado[0]
+            try:
+                grid, resumo, frac_dia, entradas = self._montar(chave)
+            except (OSError, ValueError, KeyError, IndexError):
+                # Arquivo meio escrito ou ausente: segue com a versão anterior.
+                if self._estado is not None:
+                    return self._estado[0]
+                raise
+
+            versao = hashlib.blake2b(
+                repr((chave, self.slot_minutos)).encode(), digest_size=6
+            ).hexdigest()
+            slot_minutos = self.slot_minutos
+            if entradas is None:
+                # Grid exportado: a granularidade é a dele, não a configurada.
+                slot_minutos = projecao.minutos_por_slot(grid["SLOT"].to_numpy(), slot_minutos)
+            snap = SnapshotDados(
+                grid=grid,
+                resumo=resumo,
+                versao=versao,
+                frac_dia=frac_dia,
+                slot_minutos=slot_minutos,
+            )
+            self._estado = (snap, entradas)
+            self._chave = chave
+            return snap
+
+    # -----------------------------------------------------
+    # Recortes por dimensão (canal / região / loja)
+    # -----------------------------------------------------
+    def dimensoes(self) -> dict[str, list]:
+        """Valores de cada dimensão presentes nos pedidos do snapshot atual."""
+        _, entradas = self._estado or (None, None)
+        if entradas is None:
+            return {}
+        if self._seguidor is not None and entradas[0] is None:
+            return {k: sorted(v) for k, v in self._valores_fluxo.items()}
+        pedidos = entradas[0]
+        return {
+            chave: sorted(pedidos[chave].dropna().unique().tolist())
+            for chave in projecao.DIMENSOES
+            if chave in pedidos.columns
+        }
+
+    def indice(self, estado: tuple | None = None) -> projecao.IndicePedidos | None:
+        """Índice dimensão → linhas dos pedidos, montado uma vez por versão.
+
+        `estado` é um par (snapshot, entradas) já lido de `_estado`; sem ele,
+        vale o publicado agora.
+        """
+        snap, entradas = estado or self._estado or (None, None)
+        if entradas is None or entradas[0] is None:
+            return None
+        atual = self._indice
+        if atual is None or atual[0] != snap.versao:
+            atual = (snap.versao, projecao.IndicePedidos(entradas[0]))
+            self._indice = atual
+        return atual[1]
+
+    def projetar(self, filtro: dict | None) -> SnapshotDados:
+        """Snapshot recortado pelo filtro, a partir das entradas já carregadas.
+
+        Levanta ValueError se os dados publicados não permitem o recorte
+        (grid e resumo exportados em CSV, sem pedidos): devolver o
+        consolidado no lugar vazaria a visão de quem tem escopo.
+        """
+        estado = self._estado
+        snap, entradas = estado
+        chave = chave_filtro(filtro)
+        if not chave:
+            return snap
+        if entradas is None:
+            raise ValueError(
+                "Recorte por dimensão exige pedidos; os dados atuais são o grid exportado."
+            )
+
+        pedidos, metas = entradas
+        if pedidos is None:
+            return self._projetar_fluxo(chave, filtro)
+        ts = pd.to_datetime(pedidos["timestamp"])
+        ref, slot_atual, curvas = projecao.curvas_pedidos(
+            pedidos,
+            data_referencia=ts.max(),
+            ate=ts.max(),
+            filtro=dict(chave),
+            slot_minutos=self.slot_minutos,
+            historico=self.historico,
+            indice=self.indice(estado),
+        )
+        grid, resumo = projecao.montar_dia(
+            curvas, ref, slot_atual, metas_para(metas, filtro), self.slot_minutos
+        )
+        versao = hashlib.blake2b(
+            repr((snap.versao, chave)).encode(), digest_size=6
+        ).hexdigest()
+        return SnapshotDados(
+            grid=grid,
+            resumo=resumo,
+            versao=versao,
+            frac_dia=curvas["frac_hist"],
+            slot_minutos=self.slot_minutos,
+        )
+
+    def _projetar_fluxo(self, chave: tuple, filtro: dict) -> SnapshotDados:
+        with self._lock:
+            # Sob o lock, acumuladores e estado publicado são da mesma versão.
+            snap, (_, metas) = self._estado
+            acum, _ = self._recorte_fluxo(chave)
+            curvas = self._curvas_fluxo(acum)
+            ref, slot_atual = self._ref_fluxo, acum.slot_atual
+        grid, resumo = projecao.montar_dia(
+            curvas, ref, slot_atual, metas_para(metas, filtro), self.slot_minutos
+        )
+        versao = hashlib.blake2b(repr((snap.versao, chave)).encode(), digest_size=6).hexdigest()
+        return SnapshotDados(
+            grid=grid,
+            resumo=resumo,
+            versao=versao,
+            frac_dia=curvas["frac_hist"],
+            slot_minutos=self.slot_minutos,
+        )
+
+    def abertura(self, chave: str, filtro: dict | None = None) -> pd.Series:
+        """Venda do dia por valor da dimensão `chave`, dentro do filtro."""
+        estado = self._estado
+        _, entradas = estado or (None, None)
+        if entradas is None:
+            return pd.Series(dtype=float)
+        if entradas[0] is None:
+            # Modo log: somas do recorte mantidas a cada lote novo.
+            with self._lock:
+                _, somas = self._recorte_fluxo(chave_filtro(filtro))
+                soma = somas.get(chave)
+            return pd.Series(dtype=float) if soma is None else soma.sort_values(ascending=False)
+        pedidos = entradas[0]
+        if chave not in pedidos.columns:
+            return pd.Series(dtype=float)
+        ts = pd.to_datetime(pedidos["timestamp"])
+        recorte = self.indice(estado).filtrar(pedidos, filtro)
+        inicio_dia = ts.max().normalize()
+        hoje = recorte[(pd.to_datetime(recorte["timestamp"]) >= inicio_dia).to_numpy()]
+        return projecao.abertura(hoje, chave)
+
+
+class AtualizadorDados:
+    """Atualizador único por processo, compartilhado por todas as sessões.
+
+    Uma thread em segundo plano confere os arquivos a cada `intervalo`
+    segundos e publica o snapshot mais recente. As sessões só leem
+    `snapshot`, sem tocar no disco, então o custo de cada rerun não cresce
+    com o número de telas abertas.
+
+    Com uma `linha_tempo.LinhaTempo`, cada versão nova também é registrada
+    no slot dela, para o replay do dia.
+    """
+
+    def __init__(
+        self, carregador: CarregadorDados, intervalo: float = 5.0, linha_tempo=None
+    ):
+        self.carregador = carregador
+        self.intervalo = intervalo
+        self.linha_tempo = linha_tempo
+        self._parar = threading.Event()
+        self._recortes: dict[tuple, Future] = {}
+        self._versao_recortes: str | None = None
+        self._lock_recortes = threading.Lock()
+        self._memo_chamadas = 0
+        self._memo_faltas = 0
+
+        # Primeira carga síncrona: nenhuma sessão fica sem dados.
+        self._snapshot = carregador.carregar()
+        self._registrar(self._snapshot)
+        self._thread = threading.Thread(
+            target=self._loop, name="atualizador-dados", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def snapshot(self) -> SnapshotDados:
+        return self._snapshot
+
+    @property
+    def versao(self) -> str:
+        return self._snapshot.versao
+
+    def atualizar(self) -> SnapshotDados:
+        """Confere os arquivos agora e publica o resultado."""
+        try:
+            snap = self.carregador.carregar()
+        except (OSError, ValueError, KeyError, IndexError):
+            return self._snapshot
+        if snap.versao != self._snapshot.versao:
+            self._registrar(snap)
+        self._snapshot = snap
+        return snap
+
+    def _registrar(self, snap: SnapshotDados):
+        if self.linha_tempo is None:
+            return
+        try:
+            self.linha_tempo.registrar_snapshot(snap.grid, snap.resumo, snap.slot_minutos)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.atualizar()
+            except Exception:
+                # A thread não pode morrer: sem ela todas as sessões ficam
+                # presas no último snapshot até o processo reiniciar.
+                log.exception("Falha ao atualizar os dados; mantendo a versão anterior.")
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join(timeout=self.intervalo)
+
+    def _memo(self, chave: tuple, calcular):
+        """Resultado de `calcular()` guardado até a próxima versão dos dados.
+
+        O lock só protege o dicionário: a primeira chamada de uma chave
+        publica um `Future` e calcula fora dele, e quem pedir a mesma chave
+        enquanto isso espera esse `Future`. Recortes diferentes (e as
+        chaves já prontas) não ficam na fila atrás de um recálculo.
+        """
+        with self._lock_recortes:
+            versao = self.carregador.versao
+            if self._versao_recortes != versao:
+                self._recortes = {}
+                self._versao_recortes = versao
+            self._memo_chamadas += 1
+            futuro = self._recortes.get(chave)
+            calcula = futuro is None
+            if calcula:
+                self._memo_faltas += 1
+                futuro = Future()
+                self._recortes[chave] = futuro
+        if calcula:
+            try:
+                futuro.set_result(calcular())
+            except BaseException as erro:
+                futuro.set_exception(erro)
+                # Falhou: a próxima chamada tenta de novo.
+                with self._lock_recortes:
+                    if self._recortes.get(chave) is futuro:
+                        del self._recortes[chave]
+        return futuro.result()
+
+    def estatisticas_memo(self) -> tuple[int, int]:
+        """(chamadas, faltas) do cache de recortes desde o início do processo."""
+        return self._memo_chamadas, self._memo_faltas
+
+    def dimensoes(self) -> dict[str, list]:
+        return self._memo(("dimensoes",), self.carregador.dimensoes)
+
+    def filtrado(self, filtro: dict | None) -> SnapshotDados:
+        """Snapshot recortado pelo filtro, calculado uma vez por versão.
+
+        O cache é do processo: todas as sessões com o mesmo filtro
+        compartilham o mesmo recorte, descartado quando a versão muda.
+        """
+        chave = chave_filtro(filtro)
+        if not chave:
+            return self._snapshot
+        return self._memo(
+            ("filtro", chave), lambda: self.carregador.projetar(dict(chave))
+        )
+
+    def abertura(self, dimensao: str, filtro: dict | None = None) -> pd.Series:
+        chave = chave_filtro(filtro)
+        return self._memo(
+            ("abertura", dimensao, chave),
+            lambda: self.carregador.abertura(dimensao, dict(chave)),
+        )
@@ -0,0 +1,188 @@
+"""Leitura incremental de um log de pedidos só de acréscimo.
+
+O sistema de pedidos acrescenta linhas a `data/pedidos_fluxo.jsonl` (ou
+`.csv`, com cabeçalho) em vez de regravar um arquivo inteiro. O seguidor
+guarda o arquivo aberto e a posição em bytes da última linha completa lida;
+cada chamada lê só o que foi acrescentado desde então, então o custo
+acompanha os pedidos novos, não o tamanho do arquivo. Uma linha ainda sem
+`\\n` no fim fica para a próxima leitura.
+
+Rotação (o arquivo é renomeado e outro é criado no lugar) é percebida pela
+troca de inode: o restante do arquivo antigo é lido antes de passar para o
+novo, e uma linha final incompleta dele é descartada. Truncamento (o arquivo encolhe) recomeça do início.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Leitura máxima por chamada: um log muito atrasado é consumido em partes.
+MAX_BYTES_LEITURA = 64 * 1024 * 1024
+
+
+def _identidade(st: os.stat_result) -> tuple[int, int]:
+    return (st.st_dev, st.st_ino)
+
+
+class SeguidorPedidos:
+    """Segue um arquivo JSONL ou CSV de pedidos como o `tail -F`."""
+
+    def __init__(self, path: Path, tipos: dict[str, str] | None = None):
+        self.path = Path(path)
+        self.tipos = tipos or {}
+        self.csv = self.path.suffix.lower() == ".csv"
+        self.descartadas = 0   # linhas malformadas ignoradas
+        self.rotacoes = 0
+        self._arquivo = None
+        self._id: tuple[int, int] | None = None
+        self.posicao = 0
+        self._cabecalho: bytes | None = None
+
+    def _abrir(self) -> bool:
+        try:
+            arquivo = open(self.path, "rb")
+        except FileNotFoundError:
+            return False
+        self._fechar()
+        self._arquivo = arquivo
+        self._id = _identidade(os.fstat(arquivo.fileno()))
+        self.posicao = 0
+        self._cabecalho = None
+        return True
+
+    def _fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+    def fechar(self):
+        self._fechar()
+        self._id = None
+
+    def _ler_bytes(self) -> bytes:
+        """Linhas completas acrescentadas desde a última leitura."""
+        arquivo = self._arquivo
+        if os.fstat(arquivo.fileno()).st_size < self.posicao:
+            # Truncado no lugar: o conteúdo novo começa do zero.
+            self.posicao = 0
+            self._cabecalho = None
+        arquivo.seek(self.posicao)
+        bloco = arquivo.read(MAX_BYTES_LEITURA)
+        fim = bloco.rfind(b"\n")
+        if fim < 0:
+            return b""
+        bloco = bloco[: fim + 1]
+        self.posicao += len(bloco)
+        if self.csv and self._cabecalho is None:
+            quebra = bloco.find(b"\n")
+            self._cabecalho, bloco = bloco[: quebra + 1], bloco[quebra + 1 :]
+        return bloco
+
+    def _descartar_fragmento(self):
+        """Pula a linha final sem `\\n` de um arquivo que já foi rotacionado.
+
+        Depois da rotação ninguém mais escreve no arquivo antigo: uma linha
+        incompleta no fim dele (o escritor morreu no meio) nunca vai ser
+        completada, e esperar por ela prenderia o seguidor ali para sempre.
+        """
+        tamanho = os.fstat(self._arquivo.fileno()).st_size
+        if self.posicao >= tamanho:
+            return
+        self._arquivo.seek(self.posicao)
+        resto = self._arquivo.read(MAX_BYTES_LEITURA)
+        if len(resto) == tamanho - self.posicao and b"\n" not in resto:
+            self.descartadas += 1
+            self.posicao = tamanho
+
+    def ler_novos(self) -> pd.DataFrame:
+        """Pedidos acrescentados desde a última chamada (vazio se nada mudou)."""
+        if self._arquivo is None and not self._abrir():
+            return self._vazio()
+
+        partes = [self._ler_bytes()]
+        try:
+            trocado = _identidade(os.stat(self.path)) != self._id
+        except FileNotFoundError:
+            trocado = False   # renomeado e o novo ainda não existe
+        if trocado:
+            self._descartar_fragmento()
+        if trocado and self.posicao >= os.fstat(self._arquivo.fileno()).st_size:
+            # Rotação: o resto do arquivo antigo já foi lido acima.
+            self.rotacoes += 1
+            if self._abrir():
+                partes.append(self._ler_bytes())
+
+        quadros = [self._interpretar(p) for p in partes if p]
+        if not quadros:
+            return self._vazio()
+        return concatenar_pedidos(quadros)
+
+    def _interpretar(self, bloco: bytes) -> pd.DataFrame:
+        # Os tipos são aplicados coluna a coluna depois da leitura: um valor
+        # ruim numa linha (`"valor": "n/d"`) descarta só essa linha, não o
+        # bloco inteiro, que já ficou para trás na posição do arquivo.
+        if self.csv:
+            df = pd.read_csv(
+                io.BytesIO(self._cabecalho + bloco),
+                dtype={k: v for k, v in self.tipos.items() if v == "category"},
+                on_bad_lines="skip",
+            )
+        else:
+            linhas = []
+            for linha in bloco.splitlines():
+                if not linha.strip():
+                    continue
+                try:
+                    linhas.append(json.loads(linha))
+                except ValueError:
+                    self.descartadas += 1
+            df = pd.DataFrame(linhas)
+        if df.empty or not {"timestamp", "valor"} <= set(df.columns):
+            self.descartadas += len(df)
+            return self._vazio()
+        return self._tipar(df)
+
+    def _tipar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Aplica os tipos declarados, descartando (e contando) as linhas inválidas."""
+        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+        categorias = {}
+        for coluna, tipo in self.tipos.items():
+            if coluna not in df.columns:
+                continue
+            if tipo == "category":
+                categorias[coluna] = tipo
+            else:
+                df[coluna] = pd.to_numeric(df[coluna], errors="coerce").astype(tipo)
+        validas = df["timestamp"].notna() & df["valor"].notna()
+        self.descartadas += int((~validas).sum())
+        df = df[validas].reset_index(drop=True)
+        return df.astype(categorias)
+
+    def _vazio(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {"timestamp": pd.Series(dtype="datetime64[ns]"), "valor": pd.Series(dtype=float)}
+        )
+
+
+def concatenar_pedidos(partes: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatena lotes de pedidos mantendo as dimensões como `category`.
+
+    Lotes lidos em momentos diferentes têm categorias diferentes, e o
+    `pd.concat` comum viraria essas colunas em `object`.
+    """
+    partes = [p for p in partes if len(p)] or partes[:1]
+    if len(partes) == 1:
+        return partes[0]
+    df = pd.concat(partes, ignore_index=True)
+    for coluna in df.columns:
+        series = [p[coluna] for p in partes if coluna in p.columns]
+        if len(series) == len(partes) and all(
+            isinstance(s.dtype, pd.CategoricalDtype) for s in series
+        ):
+            df[coluna] = pd.Categorical(union_categoricals(series, ignore_order=True))
+    return df
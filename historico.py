@@ -0,0 +1,244 @@
+"""Histórico de vendas por slot, particionado por data em Parquet.
+
+Cada dia fica em `<raiz>/data=AAAA-MM-DD/` com um ou mais arquivos Parquet
+de vendas agregadas por slot (colunas `slot` e `valor`). Quando os pedidos
+trazem canal, cada canal vira um arquivo `canal=<canal>.parquet` dentro da
+partição do dia, com as colunas `regiao` e `loja`. A leitura usa memory map
+e projeção de colunas; buscar um dia abre só a partição dele, um filtro de
+canal abre só os arquivos desses canais e filtros de região/loja são
+aplicados na leitura do Parquet. D-1, D-7, a média do mês ou qualquer data
+passada viram consultas ao histórico em vez de colunas pré-calculadas no CSV.
+
+A granularidade dos slots gravados fica nos metadados de cada arquivo
+(`slot_minutos`); na leitura as vendas são reagrupadas para a granularidade
+do `HistoricoVendas`, então um histórico de 1 minuto serve painéis de 5 ou
+15 minutos (e vice-versa, espalhando o slot grosso por igual).
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import projecao
+
+PREFIXO = "data="
+PREFIXO_CANAL = "canal="
+META_SLOT = b"slot_minutos"
+
+
+class HistoricoVendas:
+    """Acesso ao histórico particionado por data."""
+
+    def __init__(self, raiz: Path, slot_minutos: int = projecao.SLOT_MINUTOS):
+        self.raiz = Path(raiz)
+        self.slot_minutos = slot_minutos
+
+    # -----------------------------------------------------
+    # Partições
+    # -----------------------------------------------------
+    def particao(self, data) -> Path:
+        return self.raiz / f"{PREFIXO}{pd.Timestamp(data):%Y-%m-%d}"
+
+    def datas(self) -> pd.DatetimeIndex:
+        """Datas disponíveis, lidas só dos nomes dos diretórios."""
+        if not self.raiz.exists():
+            return pd.DatetimeIndex([])
+        nomes = [
+            p.name[len(PREFIXO):]
+            for p in self.raiz.iterdir()
+            if p.is_dir() and p.name.startswith(PREFIXO)
+        ]
+        return pd.DatetimeIndex(sorted(pd.to_datetime(nomes)))
+
+    def dias_anteriores(self, data_referencia, n: int) -> pd.DatetimeIndex:
+        """As `n` datas mais recentes do histórico antes da referência."""
+        ref = pd.Timestamp(data_referencia).normalize()
+        datas = self.datas()
+        return datas[datas < ref][-n:]
+
+    def existe(self, data) -> bool:
+        return self.particao(data).is_dir()
+
+    # -----------------------------------------------------
+    # Escrita
+    # -----------------------------------------------------
+    def gravar_dia(self, data, vendas: pd.DataFrame, arquivo: str = "vendas"):
+        """Grava as vendas por slot de um dia (colunas `slot`, `valor`, ...).
+
+        A escrita vai para um arquivo temporário e é trocada com
+        `os.replace`, para que um leitor nunca veja um Parquet pela metade.
+        """
+        destino = self.particao(data)
+        destino.mkdir(parents=True, exist_ok=True)
+
+        tabela = pa.Table.from_pandas(
+            vendas.assign(
+                slot=vendas["slot"].astype(np.int16),
+                valor=vendas["valor"].astype(np.float64),
+            ),
+            preserve_index=False,
+        )
+        tabela = tabela.replace_schema_metadata(
+            {**(tabela.schema.metadata or {}), META_SLOT: str(self.slot_minutos).encode()}
+        )
+        final = destino / f"{arquivo}.parquet"
+        tmp = destino / f".{arquivo}.parquet.tmp"
+        pq.write_table(tabela, tmp)
+        os.replace(tmp, final)
+
+    def gravar_pedidos(self, pedidos: pd.DataFrame):
+        """Agrega pedidos brutos e grava um dia por partição.
+
+        Sem a coluna `canal`, grava só `slot`/`valor` por dia. Com ela, grava
+        um arquivo por canal, agregado por região, loja e slot.
+        """
+        if "canal" not in pedidos.columns:
+            datas, matriz = projecao.agregar_pedidos(
+                pedidos["timestamp"], pedidos["valor"], self.slot_minutos
+            )
+            slots = np.arange(matriz.shape[1])
+            for data, linha in zip(datas, matriz):
+                self.gravar_dia(data, pd.DataFrame({"slot": slots, "valor": linha}))
+            return
+
+        ts = pd.DatetimeIndex(pd.to_datetime(pedidos["timestamp"]))
+        chaves = [c for c in ["regiao", "loja"] if c in pedidos.columns]
+        agregado = (
+            pedidos[["canal", *chaves, "valor"]]
+            .assign(
+                dia=ts.normalize(),
+                slot=(ts.hour * 60 + ts.minute) // self.slot_minutos,
+            )
+            .groupby(["dia", "canal", *chaves, "slot"], sort=True, observed=True)["valor"]
+            .sum()
+            .reset_index()
+        )
+        for (dia, canal), parte in agregado.groupby(["dia", "canal"], sort=False):
+            self.gravar_dia(
+                dia,
+                parte[["slot", "valor", *chaves]],
+                arquivo=f"{PREFIXO_CANAL}{canal}",
+            )
+
+    # -----------------------------------------------------
+    # Leitura
+    # -----------------------------------------------------
+    def arquivos(self, data, canais: list | None = None) -> list[Path]:
+        """Arquivos da partição do dia, já podados pelos canais pedidos."""
+        particao = self.particao(data)
+        if canais:
+            candidatos = [particao / f"{PREFIXO_CANAL}{c}.parquet" for c in canais]
+            return [a for a in candidatos if a.exists()]
+        return sorted(particao.glob("*.parquet"))
+
+    def canais(self, data) -> list[str]:
+        """Canais gravados para o dia, lidos só dos nomes dos arquivos."""
+        return [
+            a.stem[len(PREFIXO_CANAL):]
+            for a in self.arquivos(data)
+            if a.stem.startswith(PREFIXO_CANAL)
+        ]
+
+    def granularidade(self, data) -> int:
+        """Minutos por slot dos arquivos do dia (15 para arquivos sem o metadado)."""
+        for arquivo in self.arquivos(data):
+            meta = pq.read_schema(arquivo, memory_map=True).metadata or {}
+            if META_SLOT in meta:
+                return int(meta[META_SLOT])
+            break
+        return projecao.SLOT_MINUTOS
+
+    def ler_dia(
+        self,
+        data,
+        colunas: list[str] | None = None,
+        filtro: dict | None = None,
+    ) -> pa.Table | None:
+        """Lê a partição de um dia, só com as colunas e linhas pedidas.
+
+        O canal do `filtro` escolhe os arquivos; região e loja viram filtros
+        de leitura do Parquet. Devolve None se nenhum arquivo casar.
+        """
+        filtro = filtro or {}
+        arquivos = self.arquivos(data, filtro.get("canal"))
+        if not arquivos and not self.existe(data):
+            raise FileNotFoundError(f"Sem histórico para {pd.Timestamp(data):%Y-%m-%d}.")
+
+        tabelas = []
+        for arquivo in arquivos:
+            schema = pq.read_schema(arquivo, memory_map=True)
+            filtros = []
+            for chave in ["regiao", "loja"]:
+                valores = filtro.get(chave)
+                if not valores:
+                    continue
+                if chave not in schema.names:
+                    # Arquivo sem a dimensão não tem como casar com o filtro.
+                    filtros = None
+                    break
+                filtros.append((chave, "in", list(valores)))
+            if filtros is None:
+                continue
+            tabelas.append(
+                pq.read_table(
+                    arquivo,
+                    columns=colunas,
+                    filters=filtros or None,
+                    memory_map=True,
+                )
+            )
+        if not tabelas:
+            return None
+        return pa.concat_tables(tabelas) if len(tabelas) > 1 else tabelas[0]
+
+    def curva(self, data, filtro: dict | None = None) -> np.ndarray:
+        """Vendas por slot de um dia, somadas entre as lojas do filtro.
+
+        Zeros se a data não estiver no histórico ou nada casar com o filtro.
+        """
+        s = projecao.n_slots(self.slot_minutos)
+        if not self.existe(data):
+            return np.zeros(s)
+        tabela = self.ler_dia(data, colunas=["slot", "valor"], filtro=filtro)
+        if tabela is None:
+            return np.zeros(s)
+        slot = tabela.column("slot").to_numpy().astype(np.int64)
+        valor = tabela.column("valor").to_numpy()
+        origem = self.granularidade(data)
+        if origem < self.slot_minutos:
+            slot = slot * origem // self.slot_minutos
+        elif origem > self.slot_minutos:
+            # Slot gravado mais grosso que o pedido: divide por igual entre os finos.
+            partes = origem // self.slot_minutos
+            slot = (slot[:, None] * partes + np.arange(partes)).ravel()
+            valor = np.repeat(valor / partes, partes)
+        return np.bincount(slot, weights=valor, minlength=s)
+
+    def matriz(self, datas, filtro: dict | None = None) -> np.ndarray:
+        """Matriz dias × slots para as datas pedidas."""
+        s = projecao.n_slots(self.slot_minutos)
+        if len(datas) == 0:
+            return np.zeros((0, s))
+        return np.vstack([self.curva(d, filtro) for d in datas])
+
+    def referencias(self, data_referencia, filtro: dict | None = None) -> dict[str, np.ndarray]:
+        """Curvas de hoje, D-1, D-7, média do mês e `frac_hist` lidas do histórico.
+
+        Só são abertas as partições de D-1, D-7, do próprio dia e dos dias
+        anteriores do mesmo mês, e dentro delas só os arquivos do filtro.
+        """
+        ref = pd.Timestamp(data_referencia).normalize()
+        disponiveis = self.datas()
+        mes = disponiveis[
+            (disponiveis < ref)
+            & (disponiveis.year == ref.year)
+            & (disponiveis.month == ref.month)
+        ]
+        extras = [ref, ref - pd.Timedelta(days=1), ref - pd.Timedelta(days=7)]
+        datas = mes.union(pd.DatetimeIndex(extras).intersection(disponiveis))
+        return projecao.curvas_referencia(datas, self.matriz(datas, filtro), ref)
@@ -0,0 +1,150 @@
+"""Linha do tempo intradia do resumo: um registro por slot do dia.
+
+`saida_resumo.csv` só tem a foto atual. Aqui cada versão publicada dos dados
+grava os números do resumo (venda, projeção, gap, ritmos) na posição do seu
+slot, em arrays de tamanho fixo (um por campo, `n_slots` posições). O buffer
+é circular por dia: a posição é o próprio slot, e a virada da data de
+referência recomeça o buffer. Várias versões no mesmo slot sobrescrevem a
+mesma posição, então ver o painel "às 14:00" é uma leitura por índice.
+
+Cada dia é persistido em `<raiz>/<AAAA-MM-DD>_<m>min.parquet` (só os slots
+registrados), com escrita atômica; ao reiniciar o processo o buffer do dia
+é recarregado desse arquivo.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import projecao
+
+CAMPOS = (
+    "venda_atual_ate_slot",
+    "projecao_dia",
+    "desvio_projecao",
+    "meta_dia",
+    "percentual_dia_hist",
+    "ritmo_vs_d1",
+    "ritmo_vs_d7",
+    "ritmo_vs_media",
+)
+
+
+class LinhaTempo:
+    """Buffer de resumos por slot do dia corrente, seguro entre threads."""
+
+    def __init__(self, raiz: Path | None = None):
+        self.raiz = Path(raiz) if raiz is not None else None
+        self.data: pd.Timestamp | None = None
+        self.slot_minutos: int | None = None
+        self.versao = 0   # muda a cada registro (chave de cache dos gráficos)
+        self._valores = np.empty((len(CAMPOS), 0))
+        self._gravado = np.zeros(0, dtype=bool)
+        self._rotulos = np.empty(0, dtype=object)
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------
+    # Escrita
+    # -----------------------------------------------------
+    def _arquivo(self, data: pd.Timestamp, slot_minutos: int) -> Path:
+        return self.raiz / f"{data.date()}_{slot_minutos}min.parquet"
+
+    def _iniciar(self, data: pd.Timestamp, slot_minutos: int):
+        s = projecao.n_slots(slot_minutos)
+        self.data, self.slot_minutos = data, slot_minutos
+        self._valores = np.full((len(CAMPOS), s), np.nan)
+        self._gravado = np.zeros(s, dtype=bool)
+        self._rotulos = projecao.rotulos_slot(slot_minutos)
+        if self.raiz is None:
+            return
+        arquivo = self._arquivo(data, slot_minutos)
+        if arquivo.exists():
+            tabela = pq.read_table(arquivo).to_pandas()
+            slots = tabela["slot"].to_numpy()
+            self._valores[:, slots] = tabela[list(CAMPOS)].to_numpy(dtype=float).T
+            self._gravado[slots] = True
+
+    def registrar(self, resumo: dict, slot: int, slot_minutos: int) -> bool:
+        """Guarda o resumo na posição `slot`; devolve False se nada mudou."""
+        data = pd.Timestamp(resumo["data_referencia"]).normalize()
+        linha = np.array([float(resumo.get(c, np.nan)) for c in CAMPOS])
+        with self._lock:
+            if data != self.data or slot_minutos != self.slot_minutos:
+                self._iniciar(data, slot_minutos)
+            if not 0 <= slot < len(self._gravado):
+                return False
+            atual = self._valores[:, slot]
+            if self._gravado[slot] and np.array_equal(atual, linha, equal_nan=True):
+                return False
+            self._valores[:, slot] = linha
+            self._gravado[slot] = True
+            self.versao += 1
+            tabela = self._tabela()
+        if self.raiz is not None:
+            self._gravar(tabela, data, slot_minutos)
+        return True
+
+    def registrar_snapshot(self, grid: pd.DataFrame, resumo: dict, slot_minutos: int) -> bool:
+        """Registra um snapshot do painel no slot da última linha do grid.
+
+        `slot_minutos` vem do snapshot: logo depois da meia-noite o grid tem
+        uma linha só e não dá para deduzir a granularidade dele.
+        """
+        if grid.empty:
+            return False
+        slots = grid["SLOT"].to_numpy()
+        ultimo = int(projecao.minuto_do_dia(slots[-1:])[0]) // slot_minutos
+        return self.registrar(resumo, ultimo, slot_minutos)
+
+    def _gravar(self, tabela: pd.DataFrame, data: pd.Timestamp, slot_minutos: int):
+        self.raiz.mkdir(parents=True, exist_ok=True)
+        arrow = pa.Table.from_pandas(tabela.drop(columns="SLOT"), preserve_index=False)
+        final = self._arquivo(data, slot_minutos)
+        tmp = final.with_name(f".{final.name}.tmp")
+        pq.write_table(arrow, tmp)
+        os.replace(tmp, final)
+
+    # -----------------------------------------------------
+    # Leitura
+    # -----------------------------------------------------
+    def _tabela(self) -> pd.DataFrame:
+        slots = np.flatnonzero(self._gravado)
+        tabela = pd.DataFrame(self._valores[:, slots].T, columns=list(CAMPOS))
+        tabela.insert(0, "SLOT", self._rotulos[slots])
+        tabela.insert(0, "slot", slots.astype(np.int16))
+        return tabela
+
+    def slots(self) -> np.ndarray:
+        """Slots com registro no dia corrente, em ordem."""
+        with self._lock:
+            return np.flatnonzero(self._gravado)
+
+    def tabela(self) -> pd.DataFrame:
+        """Um registro por slot gravado (colunas `slot`, `SLOT` e `CAMPOS`)."""
+        with self._lock:
+            if self.data is None:
+                return pd.DataFrame(columns=["slot", "SLOT", *CAMPOS])
+            return self._tabela()
+
+    def em(self, slot: int) -> dict | None:
+        """Resumo como estava no `slot` (ou no último slot gravado antes dele)."""
+        with self._lock:
+            if self.data is None or not 0 <= slot < len(self._gravado):
+                return None
+            if not self._gravado[slot]:
+                anteriores = np.flatnonzero(self._gravado[: slot + 1])
+                if not len(anteriores):
+                    return None
+                slot = int(anteriores[-1])
+            return {
+                **dict(zip(CAMPOS, self._valores[:, slot].tolist())),
+                "data_referencia": str(self.data.date()),
+                "slot": slot,
+                "SLOT": self._rotulos[slot],
+            }
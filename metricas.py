@@ -0,0 +1,195 @@
+"""Métricas de desempenho do painel, compartilhadas pelo processo.
+
+Guarda as últimas durações de cada etapa (reruns, painéis, cargas, gráficos),
+contadores de acerto/falta dos caches e as sessões vistas recentemente. O
+painel de desempenho lê daqui, e `gravar_prometheus` publica o mesmo
+conteúdo no formato texto do Prometheus (para o node_exporter textfile
+collector ou qualquer coletor que leia arquivos).
+"""
+from __future__ import annotations
+
+import functools
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+AMOSTRAS_POR_ETAPA = 1000   # durações guardadas por etapa (janela móvel)
+SESSAO_ATIVA_SEGUNDOS = 300.0
+QUANTIS = (0.5, 0.95)
+
+
+class Metricas:
+    def __init__(self, amostras: int = AMOSTRAS_POR_ETAPA):
+        self._tempos: dict[str, deque] = defaultdict(lambda: deque(maxlen=amostras))
+        self._totais: dict[str, list] = defaultdict(lambda: [0, 0.0])  # n, soma
+        self._cache: dict[str, list] = defaultdict(lambda: [0, 0])  # chamadas, faltas
+        self._sessoes: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._ultima_gravacao = 0.0
+
+    # -----------------------------------------------------
+    # Coleta
+    # -----------------------------------------------------
+    def registrar(self, etapa: str, segundos: float):
+        with self._lock:
+            self._tempos[etapa].append(segundos)
+            total = self._totais[etapa]
+            total[0] += 1
+            total[1] += segundos
+
+    @contextmanager
+    def medir(self, etapa: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio)
+
+    def cronometrar(self, etapa: str | None = None):
+        """Decorador que mede cada chamada da função."""
+
+        def decorar(funcao):
+            nome = etapa or funcao.__name__
+
+            @functools.wraps(funcao)
+            def medida(*args, **kwargs):
+                with self.medir(nome):
+                    return funcao(*args, **kwargs)
+
+            return medida
+
+        return decorar
+
+    def cache(self, nome: str, cache_decorator):
+        """Aplica um cache do Streamlit contando chamadas e faltas.
+
+        A função interna só roda quando o cache falta; a externa roda em
+        toda chamada. Acertos = chamadas - faltas.
+        """
+
+        def decorar(funcao):
+            @functools.wraps(funcao)
+            def calcular(*args, **kwargs):
+                with self._lock:
+                    self._cache[nome][1] += 1
+                return funcao(*args, **kwargs)
+
+            em_cache = cache_decorator(calcular)
+
+            @functools.wraps(funcao)
+            def chamar(*args, **kwargs):
+                with self._lock:
+                    self._cache[nome][0] += 1
+                return em_cache(*args, **kwargs)
+
+            chamar.clear = getattr(em_cache, "clear", None)
+            return chamar
+
+        return decorar
+
+    def contar_cache(self, nome: str, chamadas: int, faltas: int):
+        """Publica contadores mantidos fora daqui (ex.: memo do atualizador)."""
+        with self._lock:
+            self._cache[nome] = [chamadas, faltas]
+
+    def ver_sessao(self, sessao: str):
+        agora = time.monotonic()
+        with self._lock:
+            self._sessoes[sessao] = agora
+            limite = agora - SESSAO_ATIVA_SEGUNDOS
+            for antiga in [s for s, t in self._sessoes.items() if t < limite]:
+                del self._sessoes[antiga]
+
+    # -----------------------------------------------------
+    # Leitura
+    # -----------------------------------------------------
+    def sessoes_ativas(self) -> int:
+        limite = time.monotonic() - SESSAO_ATIVA_SEGUNDOS
+        with self._lock:
+            return sum(1 for t in self._sessoes.values() if t >= limite)
+
+    def tabela_tempos(self) -> pd.DataFrame:
+        """p50/p95/média (janela recente) e totais acumulados por etapa."""
+        with self._lock:
+            copia = {k: np.fromiter(v, dtype=float) for k, v in self._tempos.items()}
+            totais = {k: tuple(v) for k, v in self._totais.items()}
+        linhas = []
+        for etapa, tempos in sorted(copia.items()):
+            if len(tempos) == 0:
+                continue
+            p50, p95 = np.quantile(tempos, QUANTIS)
+            linhas.append(
+                {
+                    "etapa": etapa,
+                    "n": totais[etapa][0],
+                    "p50": float(p50),
+                    "p95": float(p95),
+                    "media": float(tempos.mean()),
+                    "soma": totais[etapa][1],
+                }
+            )
+        return pd.DataFrame(linhas, columns=["etapa", "n", "p50", "p95", "media", "soma"])
+
+    def tabela_cache(self) -> pd.DataFrame:
+        with self._lock:
+            copia = {k: tuple(v) for k, v in self._cache.items()}
+        linhas = [
+            {"cache": nome, "chamadas": c, "acertos": c - f, "faltas": f}
+            for nome, (c, f) in sorted(copia.items())
+        ]
+        return pd.DataFrame(linhas, columns=["cache", "chamadas", "acertos", "faltas"])
+
+    # -----------------------------------------------------
+    # Prometheus
+    # -----------------------------------------------------
+    def prometheus(self) -> str:
+        tempos = self.tabela_tempos()
+        cache = self.tabela_cache()
+        linhas = [
+            "# HELP painel_duracao_segundos Duração das etapas do painel.",
+            "# TYPE painel_duracao_segundos summary",
+        ]
+        for t in tempos.itertuples():
+            rotulo = f'etapa="{t.etapa}"'
+            linhas += [
+                f'painel_duracao_segundos{{{rotulo},quantile="0.5"}} {t.p50:.6f}',
+                f'painel_duracao_segundos{{{rotulo},quantile="0.95"}} {t.p95:.6f}',
+                f"painel_duracao_segundos_sum{{{rotulo}}} {t.soma:.6f}",
+                f"painel_duracao_segundos_count{{{rotulo}}} {t.n}",
+            ]
+        linhas += [
+            "# HELP painel_cache_total Chamadas aos caches, por resultado.",
+            "# TYPE painel_cache_total counter",
+        ]
+        for c in cache.itertuples():
+            linhas += [
+                f'painel_cache_total{{cache="{c.cache}",resultado="acerto"}} {c.acertos}',
+                f'painel_cache_total{{cache="{c.cache}",resultado="falta"}} {c.faltas}',
+            ]
+        linhas += [
+            "# HELP painel_sessoes_ativas Sessões com rerun nos últimos 5 minutos.",
+            "# TYPE painel_sessoes_ativas gauge",
+            f"painel_sessoes_ativas {self.sessoes_ativas()}",
+        ]
+        return "\n".join(linhas) + "\n"
+
+    def gravar_prometheus(self, path: Path, intervalo: float = 5.0):
+        """Grava o arquivo de métricas, no máximo uma vez por `intervalo`."""
+        agora = time.monotonic()
+        with self._lock:
+            if agora - self._ultima_gravacao < intervalo:
+                return
+            self._ultima_gravacao = agora
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(self.prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+# Uma instância por processo: os módulos importados sobrevivem aos reruns.
+METRICAS = Metricas()
@@ -0,0 +1,763 @@
+"""Motor de projeção intradia.
+
+Transforma o fluxo bruto de pedidos (timestamp, valor, canal) nas mesmas
+estruturas que o painel consome: o grid slot a slot (`saida_grid.csv`) e o
+resumo do dia (`saida_resumo.csv`). Todo o cálculo é vetorizado em NumPy.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# CONFIG
+# =========================================================
+SLOT_MINUTOS = 15
+
+# Chaves de dimensão aceitas nos pedidos, no histórico e nas metas.
+DIMENSOES = ["canal", "regiao", "loja"]
+
+COLUNAS_GRID = [
+    "SLOT",
+    "valor_hoje",
+    "valor_d1",
+    "valor_d7",
+    "valor_media_mes",
+    "frac_hist",
+    "acum_hoje",
+    "acum_d1",
+    "acum_d7",
+    "acum_media_mes",
+    "ritmo_vs_d1",
+    "ritmo_vs_d7",
+    "ritmo_vs_media",
+]
+
+# Colunas que não dependem de outras: o resto do grid/resumo é derivado delas.
+COLUNAS_GRID_BRUTAS = [
+    "SLOT",
+    "valor_hoje",
+    "valor_d1",
+    "valor_d7",
+    "valor_media_mes",
+    "frac_hist",
+]
+
+COLUNAS_RESUMO_BRUTAS = [
+    "data_referencia",
+    "meta_dia",
+    "total_d1",
+    "meta_d1",
+    "total_d7",
+    "meta_d7",
+]
+
+COLUNAS_RESUMO = [
+    "data_referencia",
+    "meta_dia",
+    "venda_atual_ate_slot",
+    "percentual_dia_hist",
+    "tipo_percentual_base",
+    "projecao_dia",
+    "desvio_projecao",
+    "total_d1",
+    "meta_d1",
+    "desvio_d1",
+    "total_d7",
+    "meta_d7",
+    "desvio_d7",
+    "ritmo_vs_d1",
+    "ritmo_vs_d7",
+    "ritmo_vs_media",
+    "explicacao_ritmo",
+    "explicacao_d1",
+    "explicacao_d7",
+]
+
+
+# =========================================================
+# SLOTS
+# =========================================================
+def n_slots(slot_minutos: int = SLOT_MINUTOS) -> int:
+    return 1440 // slot_minutos
+
+
+def rotulos_slot(slot_minutos: int = SLOT_MINUTOS) -> np.ndarray:
+    """Rótulos "HH:MM" de todos os slots do dia."""
+    minutos = np.arange(n_slots(slot_minutos)) * slot_minutos
+    return np.array([f"{m // 60:02d}:{m % 60:02d}" for m in minutos], dtype=object)
+
+
+def minuto_do_dia(slots) -> np.ndarray:
+    """Rótulos "HH:MM" → minuto do dia (int16), de forma vetorizada."""
+    partes = pd.Series(slots, dtype="string").str.split(":", expand=True)
+    if partes.empty:
+        return np.zeros(0, dtype=np.int16)
+    horas = partes[0].astype(np.int16).to_numpy()
+    minutos = partes[1].astype(np.int16).to_numpy()
+    return horas * 60 + minutos
+
+
+def minutos_por_slot(slots, padrao: int = SLOT_MINUTOS) -> int:
+    """Granularidade de uma sequência de rótulos "HH:MM" consecutivos.
+
+    Com menos de dois rótulos não há como medir: vale `padrao`.
+    """
+    if len(slots) < 2:
+        return padrao
+    inicio, seguinte = minuto_do_dia(list(slots[:2]))
+    return int(seguinte - inicio)
+
+
+def _dividir(a, b) -> np.ndarray:
+    """Divisão elemento a elemento que devolve NaN onde o divisor é zero."""
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    out = np.full(np.broadcast(a, b).shape, np.nan)
+    np.divide(a, b, out=out, where=b != 0)
+    return out
+
+
+# =========================================================
+# AGREGAÇÃO DE PEDIDOS
+# =========================================================
+def filtrar_pedidos(pedidos: pd.DataFrame, filtro: dict | None) -> pd.DataFrame:
+    """Mantém só as linhas cujas dimensões estão nos valores do filtro.
+
+    `filtro` mapeia dimensão → lista de valores aceitos; listas vazias e
+    dimensões ausentes no DataFrame são ignoradas.
+    """
+    if not filtro:
+        return pedidos
+    mask = np.ones(len(pedidos), dtype=bool)
+    for chave, valores in filtro.items():
+        if valores and chave in pedidos.columns:
+            mask &= pedidos[chave].isin(valores).to_numpy()
+    return pedidos[mask]
+
+
+class IndicePedidos:
+    """Índice das linhas dos pedidos por valor de cada dimensão.
+
+    Montado uma vez por versão dos pedidos: para cada dimensão, as linhas
+    são ordenadas pelo código do valor (`argsort` estável) e `limites`
+    marca onde começa cada valor. Um recorte vira a concatenação de fatias
+    dessa ordem, sem varrer a tabela inteira com máscaras.
+    """
+
+    def __init__(self, pedidos: pd.DataFrame, dimensoes: list[str] = DIMENSOES):
+        self.n_linhas = len(pedidos)
+        self._dims = {}
+        for chave in dimensoes:
+            if chave not in pedidos.columns:
+                continue
+            codigos, valores = pd.factorize(pedidos[chave], sort=False)
+            ordem = np.argsort(codigos, kind="stable")
+            limites = np.searchsorted(codigos[ordem], np.arange(len(valores) + 1))
+            posicao = {str(v): i for i, v in enumerate(valores)}
+            self._dims[chave] = (codigos, ordem, limites, posicao)
+
+    def linhas(self, filtro: dict | None) -> np.ndarray | None:
+        """Posições (ordenadas) das linhas do recorte; None = todas as linhas."""
+        partes = []
+        for chave, valores in (filtro or {}).items():
+            if not valores or chave not in self._dims:
+                continue
+            codigos, ordem, limites, posicao = self._dims[chave]
+            alvo = np.array(
+                sorted({posicao[str(v)] for v in valores if str(v) in posicao}), dtype=int
+            )
+            tamanho = int((limites[alvo + 1] - limites[alvo]).sum()) if len(alvo) else 0
+            partes.append((tamanho, chave, alvo))
+        if not partes:
+            return None
+
+        # Começa pela dimensão mais seletiva e confere as outras só nessas linhas.
+        partes.sort(key=lambda p: p[0])
+        _, chave, alvo = partes[0]
+        _, ordem, limites, _ = self._dims[chave]
+        linhas = np.concatenate(
+            [ordem[limites[i]:limites[i + 1]] for i in alvo] or [np.zeros(0, dtype=int)]
+        )
+        for _, chave, alvo in partes[1:]:
+            linhas = linhas[np.isin(self._dims[chave][0][linhas], alvo)]
+        return np.sort(linhas)
+
+    def filtrar(self, pedidos: pd.DataFrame, filtro: dict | None) -> pd.DataFrame:
+        """Mesmo resultado de `filtrar_pedidos`, a partir do índice."""
+        linhas = self.linhas(filtro)
+        return pedidos if linhas is None else pedidos.iloc[linhas]
+
+
+def abertura(pedidos: pd.DataFrame, chave: str) -> pd.Series:
+    """Total vendido por valor da dimensão `chave`, do maior para o menor."""
+    return pedidos.groupby(chave, sort=False)["valor"].sum().sort_values(ascending=False)
+
+
+def agregar_pedidos(
+    timestamps,
+    valores,
+    slot_minutos: int = SLOT_MINUTOS,
+) -> tuple[pd.DatetimeIndex, np.ndarray]:
+    """Soma os pedidos numa matriz dias × slots.
+
+    Devolve as datas (ordenadas) e a matriz de vendas, com um único
+    `np.bincount` sobre o índice linear (dia, slot).
+    """
+    ts = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    valores = np.asarray(valores, dtype=float)
+    s = n_slots(slot_minutos)
+
+    codigos, datas = pd.factorize(ts.normalize(), sort=True)
+    slot = (ts.hour.to_numpy() * 60 + ts.minute.to_numpy()) // slot_minutos
+    idx = codigos * s + slot
+
+    matriz = np.bincount(idx, weights=valores, minlength=len(datas) * s)
+    return pd.DatetimeIndex(datas), matriz.reshape(len(datas), s)
+
+
+def curvas_referencia(
+    datas: pd.DatetimeIndex,
+    matriz: np.ndarray,
+    data_referencia,
+) -> dict[str, np.ndarray]:
+    """Extrai hoje, D-1, D-7, média do mês e a curva intradia histórica.
+
+    A média do mês e o `frac_hist` usam os dias do mesmo mês anteriores à
+    data de referência. O `frac_hist` é a média, entre esses dias, da fração
+    acumulada do faturamento diário em cada slot.
+    """
+    ref = pd.Timestamp(data_referencia).normalize()
+    s = matriz.shape[1]
+    vazio = np.zeros(s)
+
+    def linha(data):
+        pos = datas.get_indexer([data])[0]
+        return matriz[pos] if pos >= 0 else vazio
+
+    mask_mes = (datas < ref) & (datas.year == ref.year) & (datas.month == ref.month)
+    dias_mes = matriz[np.asarray(mask_mes)]
+
+    if len(dias_mes):
+        media_mes = dias_mes.mean(axis=0)
+        totais = dias_mes.sum(axis=1, keepdims=True)
+        fracs = _dividir(np.cumsum(dias_mes, axis=1), totais)
+        validos = totais[:, 0] > 0
+        frac_hist = fracs[validos].mean(axis=0) if validos.any() else vazio
+    else:
+        media_mes = vazio
+        frac_hist = vazio
+
+    return {
+        "valor_hoje": linha(ref),
+        "valor_d1": linha(ref - pd.Timedelta(days=1)),
+        "valor_d7": linha(ref - pd.Timedelta(days=7)),
+        "valor_media_mes": media_mes,
+        "frac_hist": frac_hist,
+    }
+
+
+# =========================================================
+# GRID & RESUMO
+# =========================================================
+def derivar_grid(
+    valor_hoje,
+    valor_d1,
+    valor_d7,
+    valor_media_mes,
+    frac_hist,
+    slots=None,
+) -> pd.DataFrame:
+    """Monta o grid com acumulados e ritmos a partir das curvas por slot."""
+    valor_hoje = np.asarray(valor_hoje, dtype=float)
+    if slots is None:
+        slots = rotulos_slot()[: len(valor_hoje)]
+
+    grid = pd.DataFrame(
+        {
+            "SLOT": slots,
+            "valor_hoje": valor_hoje,
+            "valor_d1": np.asarray(valor_d1, dtype=float),
+            "valor_d7": np.asarray(valor_d7, dtype=float),
+            "valor_media_mes": np.asarray(valor_media_mes, dtype=float),
+            "frac_hist": np.asarray(frac_hist, dtype=float),
+        }
+    )
+    for ref in ["hoje", "d1", "d7", "media_mes"]:
+        grid[f"acum_{ref}"] = np.cumsum(grid[f"valor_{ref}"].to_numpy())
+
+    acum_hoje = grid["acum_hoje"].to_numpy()
+    grid["ritmo_vs_d1"] = _dividir(acum_hoje, grid["acum_d1"].to_numpy())
+    grid["ritmo_vs_d7"] = _dividir(acum_hoje, grid["acum_d7"].to_numpy())
+    grid["ritmo_vs_media"] = _dividir(acum_hoje, grid["acum_media_mes"].to_numpy())
+    grid.index = pd.Index(minuto_do_dia(slots), name="minuto")
+    return grid[COLUNAS_GRID]
+
+
+def derivar_resumo(
+    grid: pd.DataFrame,
+    data_referencia,
+    meta_dia: float,
+    total_d1: float,
+    meta_d1: float,
+    total_d7: float,
+    meta_d7: float,
+) -> dict:
+    """Calcula o resumo do dia no último slot do grid."""
+    ultimo = grid.iloc[-1]
+    venda_atual = float(ultimo["acum_hoje"])
+    frac = float(ultimo["frac_hist"])
+    projecao = venda_atual / frac if frac > 0 else np.nan
+
+    desvio_d1 = total_d1 - meta_d1
+    desvio_d7 = total_d7 - meta_d7
+
+    return {
+        "data_referencia": pd.Timestamp(data_referencia).strftime("%Y-%m-%d"),
+        "meta_dia": float(meta_dia),
+        "venda_atual_ate_slot": venda_atual,
+        "percentual_dia_hist": frac,
+        "tipo_percentual_base": "intradia_hist",
+        "projecao_dia": projecao,
+        "desvio_projecao": projecao - meta_dia,
+        "total_d1": float(total_d1),
+        "meta_d1": float(meta_d1),
+        "desvio_d1": desvio_d1,
+        "total_d7": float(total_d7),
+        "meta_d7": float(meta_d7),
+        "desvio_d7": desvio_d7,
+        "ritmo_vs_d1": float(ultimo["ritmo_vs_d1"]),
+        "ritmo_vs_d7": float(ultimo["ritmo_vs_d7"]),
+        "ritmo_vs_media": float(ultimo["ritmo_vs_media"]),
+        "explicacao_ritmo": (
+            f"Até agora vendemos {venda_atual:,.0f}, equivalente a "
+            f"{frac:.2%} do padrão intradia histórico."
+        ),
+        "explicacao_d1": (
+            f"Ontem fechamos em {total_d1:,.0f} vs meta {meta_d1:,.0f} "
+            f"({desvio_d1:,.0f} de desvio)."
+        ),
+        "explicacao_d7": (
+            f"Há 7 dias fechamos em {total_d7:,.0f} vs meta {meta_d7:,.0f} "
+            f"({desvio_d7:,.0f} de desvio)."
+        ),
+    }
+
+
+def curvas_pedidos(
+    pedidos: pd.DataFrame,
+    data_referencia=None,
+    ate=None,
+    filtro: dict | None = None,
+    slot_minutos: int = SLOT_MINUTOS,
+    historico=None,
+    indice: IndicePedidos | None = None,
+) -> tuple[pd.Timestamp, int, dict[str, np.ndarray]]:
+    """Data de referência, slot corrente e curvas do dia inteiro (ver `projetar_pedidos`).
+
+    Com um `indice` dos mesmos pedidos, o recorte sai dele em vez das máscaras.
+    """
+    ultimo = pd.to_datetime(pedidos["timestamp"]).max()
+    if pd.isna(ultimo):
+        # Arquivo só com cabeçalho (ou meio escrito): não há dia para projetar.
+        raise ValueError("Pedidos sem nenhuma linha com timestamp.")
+    if indice is not None:
+        pedidos = indice.filtrar(pedidos, filtro)
+    else:
+        pedidos = filtrar_pedidos(pedidos, filtro)
+
+    ts = pd.to_datetime(pedidos["timestamp"])
+    datas, matriz = agregar_pedidos(ts, pedidos["valor"], slot_minutos)
+
+    ref = pd.Timestamp(ultimo if data_referencia is None else data_referencia).normalize()
+    if ate is None:
+        ate = ultimo if ultimo.normalize() == ref else ref + pd.Timedelta(days=1, minutes=-1)
+    ate = pd.Timestamp(ate)
+    slot_atual = (ate.hour * 60 + ate.minute) // slot_minutos
+
+    curvas = curvas_referencia(datas, matriz, ref)
+    if historico is not None:
+        curvas = {
+            **historico.referencias(ref, filtro),
+            "valor_hoje": curvas["valor_hoje"],
+        }
+    return ref, slot_atual, curvas
+
+
+def montar_dia(
+    curvas: dict[str, np.ndarray],
+    data_referencia,
+    slot_atual: int,
+    metas: dict | None = None,
+    slot_minutos: int = SLOT_MINUTOS,
+) -> tuple[pd.DataFrame, dict]:
+    """Grid até o slot corrente e resumo, a partir das curvas do dia inteiro."""
+    ref = pd.Timestamp(data_referencia).normalize()
+    corte = slice(0, slot_atual + 1)
+    grid = derivar_grid(
+        curvas["valor_hoje"][corte],
+        curvas["valor_d1"][corte],
+        curvas["valor_d7"][corte],
+        curvas["valor_media_mes"][corte],
+        curvas["frac_hist"][corte],
+        slots=rotulos_slot(slot_minutos)[corte],
+    )
+
+    metas = {pd.Timestamp(k).normalize(): float(v) for k, v in (metas or {}).items()}
+    d1 = ref - pd.Timedelta(days=1)
+    d7 = ref - pd.Timedelta(days=7)
+    resumo = derivar_resumo(
+        grid,
+        ref,
+        meta_dia=metas.get(ref, 0.0),
+        total_d1=float(curvas["valor_d1"].sum()),
+        meta_d1=metas.get(d1, 0.0),
+        total_d7=float(curvas["valor_d7"].sum()),
+        meta_d7=metas.get(d7, 0.0),
+    )
+    return grid, resumo
+
+
+def projetar_pedidos(
+    pedidos: pd.DataFrame,
+    metas: dict | None = None,
+    data_referencia=None,
+    ate=None,
+    filtro: dict | None = None,
+    slot_minutos: int = SLOT_MINUTOS,
+    historico=None,
+) -> tuple[pd.DataFrame, dict]:
+    """Gera grid e resumo a partir dos pedidos brutos.
+
+    `pedidos` precisa das colunas `timestamp` e `valor` (e das dimensões
+    usadas no `filtro`, ver `filtrar_pedidos`). `metas` mapeia data → meta do
+    dia. Sem `data_referencia` usa-se o dia do último pedido; sem `ate`, o
+    grid vai até o slot desse último pedido. Com um `historico`
+    (`historico.HistoricoVendas`), as curvas de referência vêm dele, lidas
+    só das partições do filtro, e os pedidos só precisam cobrir o dia corrente.
+    """
+    ref, slot_atual, curvas = curvas_pedidos(
+        pedidos, data_referencia, ate, filtro, slot_minutos, historico
+    )
+    return montar_dia(curvas, ref, slot_atual, metas, slot_minutos)
+
+
+# =========================================================
+# PREVISÃO DO RESTO DO DIA
+# =========================================================
+def prever_restante(
+    venda_atual: float,
+    slot_atual: int,
+    projecao_dia: float,
+    frac_dia,
+    slot_minutos: int = SLOT_MINUTOS,
+) -> pd.DataFrame:
+    """Curva prevista dos slots seguintes até o fim do dia.
+
+    Distribui o que falta para a projeção (`projecao_dia - venda_atual`) nos
+    slots restantes conforme o formato da curva histórica do dia inteiro
+    (`frac_dia`, fração acumulada por slot). A previsão começa no slot
+    corrente, para emendar com o realizado, e termina na projeção.
+    """
+    frac_dia = np.asarray(frac_dia, dtype=float)
+    frac_atual = frac_dia[slot_atual]
+    restante = 1.0 - frac_atual
+
+    futuro = frac_dia[slot_atual:]
+    if restante > 0:
+        peso = (futuro - frac_atual) / restante
+    else:
+        peso = np.linspace(0.0, 1.0, len(futuro))
+    acum = venda_atual + (projecao_dia - venda_atual) * peso
+    valor = np.diff(acum, prepend=np.nan)
+
+    return pd.DataFrame(
+        {
+            "SLOT": rotulos_slot(slot_minutos)[slot_atual:],
+            "valor_prev": valor,
+            "acum_prev": acum,
+        }
+    )
+
+
+# =========================================================
+# ACUMULADOR INCREMENTAL
+# =========================================================
+class AcumuladorSlots:
+    """Estado intradia que absorve pedidos um a um, em tempo constante.
+
+    As curvas de referência (D-1, D-7, média do mês e `frac_hist`) ficam em
+    arrays de tamanho fixo, com os acumulados pré-calculados. Um pedido no
+    slot corrente atualiza `valor_hoje`, `acum_hoje` e os três ritmos daquele
+    slot em O(1); avançar o relógio preenche só os slots pulados. Pedidos
+    atrasados (slot anterior ao corrente) são aceitos, mas custam O(slots).
+    """
+
+    def __init__(
+        self,
+        valor_d1,
+        valor_d7,
+        valor_media_mes,
+        frac_hist,
+        slot_minutos: int = SLOT_MINUTOS,
+    ):
+        self.slot_minutos = slot_minutos
+        s = n_slots(slot_minutos)
+        self.slots = rotulos_slot(slot_minutos)
+
+        self.valor_d1 = np.asarray(valor_d1, dtype=float).copy()
+        self.valor_d7 = np.asarray(valor_d7, dtype=float).copy()
+        self.valor_media_mes = np.asarray(valor_media_mes, dtype=float).copy()
+        self.frac_hist = np.asarray(frac_hist, dtype=float).copy()
+        for arr in (self.valor_d1, self.valor_d7, self.valor_media_mes, self.frac_hist):
+            if arr.shape != (s,):
+                raise ValueError(f"Curvas de referência precisam ter {s} slots.")
+
+        self.acum_d1 = np.cumsum(self.valor_d1)
+        self.acum_d7 = np.cumsum(self.valor_d7)
+        self.acum_media_mes = np.cumsum(self.valor_media_mes)
+
+        self.valor_hoje = np.zeros(s)
+        self.acum_hoje = np.zeros(s)
+        self.ritmo_vs_d1 = np.full(s, np.nan)
+        self.ritmo_vs_d7 = np.full(s, np.nan)
+        self.ritmo_vs_media = np.full(s, np.nan)
+        self.slot_atual = -1
+
+    @classmethod
+    def de_curvas(cls, curvas: dict, slot_minutos: int = SLOT_MINUTOS):
+        """Cria o acumulador a partir do dicionário de `curvas_referencia`."""
+        return cls(
+            curvas["valor_d1"],
+            curvas["valor_d7"],
+            curvas["valor_media_mes"],
+            curvas["frac_hist"],
+            slot_minutos=slot_minutos,
+        )
+
+    def _atualizar_ritmos(self, i):
+        acum = self.acum_hoje[i]
+        self.ritmo_vs_d1[i] = _dividir(acum, self.acum_d1[i])
+        self.ritmo_vs_d7[i] = _dividir(acum, self.acum_d7[i])
+        self.ritmo_vs_media[i] = _dividir(acum, self.acum_media_mes[i])
+
+    def avancar(self, slot: int):
+        """Leva o relógio até `slot`, repetindo o acumulado nos slots vazios."""
+        if slot <= self.slot_atual:
+            return
+        base = self.acum_hoje[self.slot_atual] if self.slot_atual >= 0 else 0.0
+        novos = slice(self.slot_atual + 1, slot + 1)
+        self.acum_hoje[novos] = base
+        self._atualizar_ritmos(novos)
+        self.slot_atual = slot
+
+    def _conferir_slots(self, primeiro: int, ultimo: int):
+        s = len(self.valor_hoje)
+        if primeiro < 0 or ultimo >= s:
+            raise ValueError(f"Slots precisam estar entre 0 e {s - 1}.")
+
+    def adicionar(self, slot: int, valor: float):
+        """Registra um pedido no slot informado."""
+        self._conferir_slots(slot, slot)
+        self.avancar(slot)
+        self.valor_hoje[slot] += valor
+        if slot == self.slot_atual:
+            self.acum_hoje[slot] += valor
+            self._atualizar_ritmos(slot)
+        else:
+            # Pedido atrasado: corrige o acumulado dali até o slot corrente.
+            trecho = slice(slot, self.slot_atual + 1)
+            self.acum_hoje[trecho] += valor
+            self._atualizar_ritmos(trecho)
+
+    def adicionar_lote(self, slots, valores):
+        """Registra vários pedidos de uma vez (custo proporcional ao lote)."""
+        slots = np.asarray(slots, dtype=np.int64)
+        if slots.size == 0:
+            return
+        valores = np.asarray(valores, dtype=float)
+        s = len(self.valor_hoje)
+        primeiro = int(slots.min())
+        self._conferir_slots(primeiro, int(slots.max()))
+        soma = np.bincount(slots, weights=valores, minlength=s)
+
+        self.avancar(int(slots.max()))
+        self.valor_hoje += soma
+        trecho = slice(primeiro, self.slot_atual + 1)
+        self.acum_hoje[trecho] += np.cumsum(soma[trecho])
+        self._atualizar_ritmos(trecho)
+
+    def grid(self) -> pd.DataFrame:
+        """Grid até o slot corrente, com as mesmas colunas de `saida_grid.csv`."""
+        corte = slice(0, self.slot_atual + 1)
+        return pd.DataFrame(
+            {
+                "SLOT": self.slots[corte],
+                "valor_hoje": self.valor_hoje[corte],
+                "valor_d1": self.valor_d1[corte],
+                "valor_d7": self.valor_d7[corte],
+                "valor_media_mes": self.valor_media_mes[corte],
+                "frac_hist": self.frac_hist[corte],
+                "acum_hoje": self.acum_hoje[corte],
+                "acum_d1": self.acum_d1[corte],
+                "acum_d7": self.acum_d7[corte],
+                "acum_media_mes": self.acum_media_mes[corte],
+                "ritmo_vs_d1": self.ritmo_vs_d1[corte],
+                "ritmo_vs_d7": self.ritmo_vs_d7[corte],
+                "ritmo_vs_media": self.ritmo_vs_media[corte],
+            }
+        )
+
+
+# =========================================================
+# SIMULAÇÃO DE META
+# =========================================================
+def varrer_metas(
+    projecao_dia: float,
+    venda_atual: float,
+    metas,
+) -> pd.DataFrame:
+    """Gap e cobertura da projeção (e da venda atual) para várias metas de uma vez."""
+    metas = np.asarray(metas, dtype=float)
+    return pd.DataFrame(
+        {
+            "meta": metas,
+            "gap": projecao_dia - metas,
+            "cobertura": _dividir(projecao_dia, metas),
+            "cobertura_atual": _dividir(venda_atual, metas),
+        }
+    )
+
+
+# =========================================================
+# MODELOS DE PROJEÇÃO
+# =========================================================
+MEIA_VIDA_DIAS = 7
+JANELA_RECENCIA_DIAS = 28  # dias históricos pesados pelo modelo de recência
+
+
+@dataclass(frozen=True)
+class BaseProjecao:
+    """Representação acumulada compartilhada por todos os modelos.
+
+    Os arrays vão do primeiro slot até o slot corrente. `fracs_hist` (dias ×
+    slots) traz a fração acumulada de cada dia histórico com venda, e
+    `idade_hist` a idade desse dia, em dias de calendário, contada a partir
+    da data de referência. Os dois são opcionais e só são usados pelos
+    modelos que pesam os dias históricos.
+    """
+
+    acum_hoje: np.ndarray
+    acum_d1: np.ndarray
+    acum_d7: np.ndarray
+    acum_media_mes: np.ndarray
+    frac_hist: np.ndarray
+    total_d1: float
+    total_d7: float
+    fracs_hist: np.ndarray | None = None
+    idade_hist: np.ndarray | None = None
+
+    @classmethod
+    def de_grid(cls, grid: pd.DataFrame, resumo: dict, curvas_hist=None, datas_hist=None):
+        """Base do grid e do resumo, com as curvas históricas (dias × slots) opcionais.
+
+        Sem `datas_hist`, as curvas são tomadas como os dias consecutivos
+        até a véspera da data de referência.
+        """
+        fracs_hist = idade_hist = None
+        if curvas_hist is not None and len(curvas_hist):
+            curvas_hist = np.asarray(curvas_hist, dtype=float)
+            ref = pd.Timestamp(resumo["data_referencia"]).normalize()
+            if datas_hist is None:
+                idade = np.arange(len(curvas_hist), 0, -1)
+            else:
+                idade = (ref - pd.DatetimeIndex(datas_hist).normalize()).days.to_numpy()
+            # A idade vem da data real antes de descartar dias sem venda:
+            # um buraco no histórico não aproxima os dias mais antigos.
+            totais = curvas_hist.sum(axis=1)
+            validos = totais > 0
+            fracs_hist = np.cumsum(curvas_hist[validos], axis=1) / totais[validos, None]
+            idade_hist = idade[validos]
+        return cls(
+            acum_hoje=grid["acum_hoje"].to_numpy(dtype=float),
+            acum_d1=grid["acum_d1"].to_numpy(dtype=float),
+            acum_d7=grid["acum_d7"].to_numpy(dtype=float),
+            acum_media_mes=grid["acum_media_mes"].to_numpy(dtype=float),
+            frac_hist=grid["frac_hist"].to_numpy(dtype=float),
+            total_d1=float(resumo["total_d1"]),
+            total_d7=float(resumo["total_d7"]),
+            fracs_hist=fracs_hist,
+            idade_hist=idade_hist,
+        )
+
+
+class ModeloProjecao(NamedTuple):
+    nome: str
+    descricao: str
+    funcao: Callable[[BaseProjecao], np.ndarray]
+
+
+MODELOS: dict[str, ModeloProjecao] = {}
+
+
+def registrar_modelo(chave: str, nome: str, descricao: str):
+    """Registra uma função `BaseProjecao -> projeção por slot` como modelo."""
+
+    def decorador(funcao):
+        MODELOS[chave] = ModeloProjecao(nome, descricao, funcao)
+        return funcao
+
+    return decorador
+
+
+@registrar_modelo(
+    "frac_hist",
+    "Curva intradia histórica",
+    "Venda acumulada dividida pela fração histórica do dia já realizada no horário.",
+)
+def modelo_frac_hist(base: BaseProjecao) -> np.ndarray:
+    return _dividir(base.acum_hoje, base.frac_hist)
+
+
+@registrar_modelo(
+    "ritmo_blend",
+    "Ritmo D-1 / D-7 / mês",
+    "Média dos fechamentos de D-1, D-7 e do mês, cada um escalado pelo ritmo do dia contra ele.",
+)
+def modelo_ritmo_blend(base: BaseProjecao) -> np.ndarray:
+    # O fechamento "do mês" é estimado pela própria curva média: acumulado / fração.
+    total_mes = _dividir(base.acum_media_mes, base.frac_hist)
+    candidatos = np.vstack(
+        [
+            _dividir(base.acum_hoje, base.acum_d1) * base.total_d1,
+            _dividir(base.acum_hoje, base.acum_d7) * base.total_d7,
+            _dividir(base.acum_hoje, base.acum_media_mes) * total_mes,
+        ]
+    )
+    # Média só dos candidatos definidos; NaN onde nenhum é (início do dia).
+    # Sem `np.nanmean`, que avisa "Mean of empty slice" a cada recálculo.
+    n = (~np.isnan(candidatos)).sum(axis=0)
+    return _dividir(np.nansum(candidatos, axis=0), n)
+
+
+@registrar_modelo(
+    "recencia_exp",
+    "Curva com peso exponencial",
+    f"Como a curva histórica, mas com dias recentes pesando mais (meia-vida de {MEIA_VIDA_DIAS} dias).",
+)
+def modelo_recencia_exp(base: BaseProjecao) -> np.ndarray:
+    if base.fracs_hist is None or len(base.fracs_hist) == 0:
+        # Sem nenhum dia histórico com venda, vale a curva média.
+        return modelo_frac_hist(base)
+    pesos = 0.5 ** (base.idade_hist / MEIA_VIDA_DIAS)
+    frac = pesos @ base.fracs_hist / pesos.sum()
+    return _dividir(base.acum_hoje, frac[: len(base.acum_hoje)])
+
+
+def projetar_modelos(base: BaseProjecao, modelos: list[str] | None = None) -> pd.DataFrame:
+    """Projeção de fechamento de cada modelo em cada slot (uma coluna por modelo)."""
+    chaves = modelos or list(MODELOS)
+    return pd.DataFrame({chave: MODELOS[chave].funcao(base) for chave in chaves})
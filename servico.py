@@ -0,0 +1,295 @@
+"""Serviço HTTP sem Streamlit para TVs, bots e outros consumidores.
+
+Usa o mesmo `dados.AtualizadorDados` do painel (uma thread confere os
+arquivos; as requisições só leem o snapshot publicado) e serve:
+
+    GET /resumo              KPIs do dia em JSON
+    GET /grid                grid slot a slot em JSON colunar
+    GET /grid.arrow          grid em Arrow IPC (stream)
+    GET /saude               versão atual dos dados
+
+Filtros de canal/região/loja vão na query string (`?canal=app&loja=12&loja=40`);
+cada valor é convertido para o tipo da coluna nos dados. Um filtro que os
+dados atuais não permitem aplicar (grid exportado em CSV, dimensão ou valor
+ausente) é um 400, nunca a visão consolidada.
+Cada resposta leva um ETag com a versão dos dados e do recorte: se o
+cliente mandar o mesmo `If-None-Match`, a resposta é um 304 sem corpo. O
+corpo serializado fica guardado por versão, então 200s repetidos também
+não serializam de novo.
+
+    python servico.py --porta 8502 [--token SEGREDO] [--slot-minutos 5]
+
+Por padrão escuta só em 127.0.0.1; um `--host` público exige `--token`.
+"""
+from __future__ import annotations
+
+import argparse
+import hmac
+import json
+import logging
+import os
+import ipaddress
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pyarrow as pa
+
+import dados
+import historico as hist
+import projecao
+
+log = logging.getLogger(__name__)
+
+DATA_DIR = Path("data")
+GRID_PATH = DATA_DIR / "saida_grid.csv"
+RESUMO_PATH = DATA_DIR / "saida_resumo.csv"
+PEDIDOS_PATH = DATA_DIR / "pedidos.csv"
+FLUXO_PATH = DATA_DIR / "pedidos_fluxo.jsonl"
+METAS_PATH = DATA_DIR / "metas.csv"
+HISTORICO_DIR = DATA_DIR / "historico"
+
+REFRESH_SEGUNDOS = 5.0
+TIPO_JSON = "application/json; charset=utf-8"
+TIPO_ARROW = "application/vnd.apache.arrow.stream"
+ERRO_FILTRO = b'{"erro":"filtro indisponivel nestes dados"}'
+ERRO_DADOS = b'{"erro":"falha ao ler os dados"}'
+
+
+def _valor_json(v):
+    if isinstance(v, (np.floating, float)):
+        return None if not np.isfinite(v) else float(v)
+    if isinstance(v, np.integer):
+        return int(v)
+    return v
+
+
+def serializar_resumo(snap: dados.SnapshotDados) -> bytes:
+    corpo = {"versao": snap.versao, "resumo": {k: _valor_json(v) for k, v in snap.resumo.items()}}
+    return json.dumps(corpo, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def serializar_grid(snap: dados.SnapshotDados) -> bytes:
+    # Colunar: um array por coluna, bem menor que uma lista de objetos.
+    colunas = snap.grid.reset_index(drop=True).to_dict(orient="list")
+    corpo = {k: [_valor_json(v) for v in valores] for k, valores in colunas.items()}
+    return json.dumps(
+        {"versao": snap.versao, "grid": corpo}, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def serializar_grid_arrow(snap: dados.SnapshotDados) -> bytes:
+    tabela = pa.Table.from_pandas(snap.grid, preserve_index=False)
+    tabela = tabela.replace_schema_metadata(
+        {**(tabela.schema.metadata or {}), b"versao": snap.versao.encode()}
+    )
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue().to_pybytes()
+
+
+RECURSOS = {
+    "/resumo": (serializar_resumo, TIPO_JSON),
+    "/grid": (serializar_grid, TIPO_JSON),
+    "/grid.arrow": (serializar_grid_arrow, TIPO_ARROW),
+}
+
+
+class ServicoPainel:
+    """Respostas serializadas por (recurso, recorte), guardadas por versão dos dados."""
+
+    def __init__(self, atualizador: dados.AtualizadorDados, token: str | None = None):
+        self.atualizador = atualizador
+        self.token = token
+        self._corpos: dict[tuple, tuple[str, bytes]] = {}
+        self._versao_corpos: str | None = None
+        self._lock = threading.Lock()
+
+    def autorizado(self, cabecalho: str | None) -> bool:
+        if not self.token:
+            return True
+        esperado = f"Bearer {self.token}"
+        return cabecalho is not None and hmac.compare_digest(cabecalho, esperado)
+
+    def tipar_filtro(self, filtro: dict[str, list[str]]) -> dict[str, list] | None:
+        """Filtro da query com os valores tipados como nos dados publicados.
+
+        A query só traz texto (`loja=12`), e as colunas de dimensão podem ser
+        inteiras: cada valor é trocado pelo valor dos dados de mesmo `str()`.
+        Devolve None se alguma dimensão ou valor não existir nos dados atuais.
+        """
+        if not filtro:
+            return {}
+        dimensoes = self.atualizador.dimensoes()
+        tipado = {}
+        for chave, valores in filtro.items():
+            if chave not in dimensoes:
+                return None
+            por_texto = {str(v): v for v in dimensoes[chave]}
+            if any(v not in por_texto for v in valores):
+                return None
+            tipado[chave] = [por_texto[v] for v in dict.fromkeys(valores)]
+        return tipado
+
+    def responder(self, recurso: str, filtro: dict) -> tuple[str, bytes]:
+        """(etag, corpo) do recurso no recorte pedido."""
+        serializar, _ = RECURSOS[recurso]
+        snap = self.atualizador.filtrado(filtro)
+        chave = (recurso, dados.chave_filtro(filtro))
+        with self._lock:
+            if self._versao_corpos != self.atualizador.versao:
+                self._corpos = {}
+                self._versao_corpos = self.atualizador.versao
+            pronto = self._corpos.get(chave)
+        if pronto is not None and pronto[0] == snap.versao:
+            return f'"{snap.versao}"', pronto[1]
+        corpo = serializar(snap)
+        with self._lock:
+            self._corpos[chave] = (snap.versao, corpo)
+        return f'"{snap.versao}"', corpo
+
+    def etag(self, filtro: dict) -> str:
+        """ETag sem serializar nada: a versão do snapshot já identifica o conteúdo."""
+        return f'"{self.atualizador.filtrado(filtro).versao}"'
+
+
+def etag_confere(etag: str, cabecalho: str | None) -> bool:
+    """`If-None-Match` pode trazer vários ETags, fracos (`W/`) ou `*`."""
+    if not cabecalho:
+        return False
+    candidatos = [c.strip().removeprefix("W/") for c in cabecalho.split(",")]
+    return "*" in candidatos or etag in candidatos
+
+
+def ler_filtro(query: str) -> dict:
+    parametros = parse_qs(query)
+    return {k: v for k, v in parametros.items() if k in projecao.DIMENSOES and v}
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "PainelProjecao/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Centenas de TVs consultando a cada poucos segundos: sem log por requisição.
+        pass
+
+    def _enviar(self, status: HTTPStatus, corpo: bytes = b"", tipo: str = TIPO_JSON, etag: str | None = None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"max-age={int(REFRESH_SEGUNDOS)}, must-revalidate")
+        if corpo:
+            self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        if corpo:
+            self.wfile.write(corpo)
+
+    def do_GET(self):
+        servico: ServicoPainel = self.server.servico
+        url = urlsplit(self.path)
+        if not servico.autorizado(self.headers.get("Authorization")):
+            self._enviar(HTTPStatus.UNAUTHORIZED, b'{"erro":"token invalido"}')
+            return
+        if url.path == "/saude":
+            corpo = json.dumps({"versao": servico.atualizador.versao}).encode()
+            self._enviar(HTTPStatus.OK, corpo)
+            return
+        if url.path not in RECURSOS:
+            self._enviar(HTTPStatus.NOT_FOUND, b'{"erro":"recurso inexistente"}')
+            return
+
+        # Sem pedidos (ou sem a dimensão) o recorte não existe: o consolidado
+        # no lugar dele vazaria dados fora do filtro.
+        filtro = servico.tipar_filtro(ler_filtro(url.query))
+        if filtro is None:
+            self._enviar(HTTPStatus.BAD_REQUEST, ERRO_FILTRO)
+            return
+        try:
+            etag = servico.etag(filtro)
+            if etag_confere(etag, self.headers.get("If-None-Match")):
+                self._enviar(HTTPStatus.NOT_MODIFIED, etag=etag)
+                return
+            etag, corpo = servico.responder(url.path, filtro)
+        except ValueError:
+            # Os dados trocaram de modo entre a conferência e o recorte.
+            self._enviar(HTTPStatus.BAD_REQUEST, ERRO_FILTRO)
+            return
+        except (OSError, KeyError, TypeError, pa.ArrowException):
+            # Histórico ilegível ou recorte que a partição não aceita: a
+            # requisição falha com um JSON, o servidor segue de pé.
+            log.exception("Falha ao montar %s para %s", url.path, filtro)
+            self._enviar(HTTPStatus.SERVICE_UNAVAILABLE, ERRO_DADOS)
+            return
+        self._enviar(HTTPStatus.OK, corpo, RECURSOS[url.path][1], etag)
+
+
+def host_local(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def criar_servidor(
+    porta: int,
+    host: str = "127.0.0.1",
+    token: str | None = None,
+    slot_minutos: int = projecao.SLOT_MINUTOS,
+    intervalo: float = REFRESH_SEGUNDOS,
+) -> ThreadingHTTPServer:
+    if not token and not host_local(host):
+        raise ValueError(f"Escutar em {host} exige um token (--token ou PAINEL_TOKEN).")
+    historico = (
+        hist.HistoricoVendas(HISTORICO_DIR, slot_minutos) if HISTORICO_DIR.exists() else None
+    )
+    carregador = dados.CarregadorDados(
+        GRID_PATH,
+        RESUMO_PATH,
+        PEDIDOS_PATH,
+        METAS_PATH,
+        historico=historico,
+        slot_minutos=slot_minutos,
+        fluxo_path=FLUXO_PATH,
+    )
+    servidor = ThreadingHTTPServer((host, porta), Handler)
+    servidor.daemon_threads = True
+    servidor.servico = ServicoPainel(dados.AtualizadorDados(carregador, intervalo), token)
+    return servidor
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP com resumo e grid do painel.")
+    parser.add_argument("--porta", type=int, default=8502)
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="fora de 127.0.0.1/localhost exige --token"
+    )
+    parser.add_argument("--slot-minutos", type=int, default=projecao.SLOT_MINUTOS)
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("PAINEL_TOKEN"),
+        help="exige 'Authorization: Bearer <token>' (padrão: $PAINEL_TOKEN)",
+    )
+    args = parser.parse_args(argv)
+    if not args.token and not host_local(args.host):
+        parser.error(f"--host {args.host} exige --token (ou PAINEL_TOKEN)")
+    servidor = criar_servidor(args.porta, args.host, args.token, args.slot_minutos)
+    print(f"Servindo em http://{args.host}:{args.porta} (resumo, grid, grid.arrow)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.servico.atualizador.parar()
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
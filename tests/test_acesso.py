@@ -0,0 +1,95 @@
+"""Limite de tentativas de login: tentativas em andamento e janela de tempo."""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import acesso
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def monotonic(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(acesso, "time", SimpleNamespace(monotonic=relogio.monotonic))
+    return relogio
+
+
+def autenticador(**kwargs):
+    credenciais = {
+        "ana": acesso.Credencial("ana", "Ana", acesso.hash_senha("certa", iteracoes=1000))
+    }
+    return acesso.Autenticador(credenciais, workers=8, max_tentativas=3, janela=60.0, **kwargs)
+
+
+def test_tentativas_em_andamento_contam_no_limite(monkeypatch, relogio):
+    liberar = threading.Event()
+    comecaram = threading.Semaphore(0)
+    conferir = acesso.conferir_senha
+
+    def conferir_lento(senha, senha_hash):
+        comecaram.release()
+        liberar.wait(5)
+        return conferir(senha, senha_hash)
+
+    monkeypatch.setattr(acesso, "conferir_senha", conferir_lento)
+    auth = autenticador()
+    resultados = []
+    threads = [
+        threading.Thread(target=lambda: resultados.append(auth.autenticar("ana", "errada")))
+        for _ in range(3)
+    ]
+    for t in threads:
+        t.start()
+    for _ in threads:
+        assert comecaram.acquire(timeout=5)
+
+    # Três verificações ainda no pool já ocupam o limite inteiro.
+    with pytest.raises(acesso.TentativasExcedidas):
+        auth.autenticar("ana", "certa")
+
+    liberar.set()
+    for t in threads:
+        t.join(5)
+    assert resultados == [(False, None)] * 3
+    assert auth._andamento == {}
+    with pytest.raises(acesso.TentativasExcedidas):
+        auth.autenticar("ana", "certa")
+
+
+def test_erros_expiram_com_a_janela(relogio):
+    auth = autenticador()
+    for _ in range(3):
+        assert auth.autenticar("ana", "errada") == (False, None)
+    with pytest.raises(acesso.TentativasExcedidas) as bloqueio:
+        auth.autenticar("ana", "certa")
+    assert bloqueio.value.segundos == pytest.approx(60.0)
+
+    relogio.agora += 30
+    with pytest.raises(acesso.TentativasExcedidas) as bloqueio:
+        auth.autenticar("ana", "certa")
+    assert bloqueio.value.segundos == pytest.approx(30.0)
+
+    relogio.agora += 31
+    assert auth.autenticar("ana", "certa") == (True, "Ana")
+    assert "ana" not in auth._erros
+
+
+def test_usuarios_inventados_nao_acumulam(monkeypatch, relogio):
+    monkeypatch.setattr(acesso, "LIMPEZA_ERROS", 4)
+    auth = autenticador()
+    auth._limite_limpeza = 4
+    for i in range(4):
+        auth.autenticar(f"antigo{i}", "x")
+    relogio.agora += 61
+    for i in range(4):
+        auth.autenticar(f"novo{i}", "x")
+    # A varredura amortizada descartou os erros que saíram da janela.
+    assert set(auth._erros) == {f"novo{i}" for i in range(4)}
@@ -0,0 +1,152 @@
+"""Log de pedidos em fluxo: o grid tem de ser o mesmo do modo pedidos completo."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dados
+import projecao
+
+HOJE = pd.Timestamp("2026-03-18")
+COLUNAS = [c for c in projecao.COLUNAS_GRID if c != "SLOT"]
+
+
+def gerar_pedidos(inicio, fim, n, seed):
+    rng = np.random.default_rng(seed)
+    segundos = rng.integers(0, int((fim - inicio).total_seconds()), n)
+    return pd.DataFrame(
+        {
+            "timestamp": inicio + pd.to_timedelta(np.sort(segundos), unit="s"),
+            "valor": rng.gamma(2.0, 80.0, n).round(2),
+            "canal": rng.choice(["app", "site"], n),
+            "regiao": rng.choice(["Sul", "Norte", "Leste"], n),
+        }
+    )
+
+
+@pytest.fixture
+def pedidos():
+    base = gerar_pedidos(HOJE - pd.Timedelta(days=20), HOJE, 6000, seed=1)
+    hoje = gerar_pedidos(HOJE, HOJE + pd.Timedelta(hours=14), 900, seed=2)
+    return base, hoje
+
+
+def linhas_jsonl(df):
+    return "".join(
+        json.dumps({**r, "timestamp": r["timestamp"].isoformat()}) + "\n"
+        for r in df.to_dict("records")
+    )
+
+
+def acrescentar(path, texto):
+    with open(path, "a", encoding="utf-8") as arquivo:
+        arquivo.write(texto)
+
+
+def carregador_fluxo(tmp_path, base):
+    base.to_csv(tmp_path / "pedidos.csv", index=False)
+    return dados.CarregadorDados(
+        tmp_path / "saida_grid.csv",
+        tmp_path / "saida_resumo.csv",
+        tmp_path / "pedidos.csv",
+        fluxo_path=tmp_path / "pedidos_fluxo.jsonl",
+    )
+
+
+def esperado(tmp_path, base, hoje, filtro=None):
+    """Grid do modo pedidos com o arquivo inteiro (base + pedidos do dia)."""
+    destino = tmp_path / "completo"
+    destino.mkdir(exist_ok=True)
+    pd.concat([base, hoje]).to_csv(destino / "pedidos.csv", index=False)
+    carregador = dados.CarregadorDados(
+        destino / "saida_grid.csv", destino / "saida_resumo.csv", destino / "pedidos.csv"
+    )
+    carregador.carregar()
+    return carregador.projetar(filtro)
+
+
+def conferir(obtido, snap):
+    assert obtido.grid["SLOT"].tolist() == snap.grid["SLOT"].tolist()
+    np.testing.assert_allclose(
+        obtido.grid[COLUNAS].to_numpy(float), snap.grid[COLUNAS].to_numpy(float), rtol=1e-9
+    )
+
+
+def test_acrescimo_com_linha_parcial(tmp_path, pedidos):
+    base, hoje = pedidos
+    log = tmp_path / "pedidos_fluxo.jsonl"
+    carregador = carregador_fluxo(tmp_path, base)
+    filtro = {"canal": ["app"]}
+
+    log.write_text(linhas_jsonl(hoje.iloc[:400]), encoding="utf-8")
+    conferir(carregador.carregar(), esperado(tmp_path, base, hoje.iloc[:400]))
+    # O recorte criado agora tem de ser alimentado só pelos pedidos novos.
+    conferir(carregador.projetar(filtro), esperado(tmp_path, base, hoje.iloc[:400], filtro))
+
+    texto = linhas_jsonl(hoje.iloc[400:700])
+    parcial = linhas_jsonl(hoje.iloc[700:701])
+    acrescentar(log, texto + parcial[:20])
+    conferir(carregador.carregar(), esperado(tmp_path, base, hoje.iloc[:700]))
+    conferir(carregador.projetar(filtro), esperado(tmp_path, base, hoje.iloc[:700], filtro))
+
+    acrescentar(log, parcial[20:] + linhas_jsonl(hoje.iloc[701:]))
+    conferir(carregador.carregar(), esperado(tmp_path, base, hoje))
+    conferir(carregador.projetar(filtro), esperado(tmp_path, base, hoje, filtro))
+
+
+def test_truncamento_recomeca_do_inicio(tmp_path, pedidos):
+    base, hoje = pedidos
+    log = tmp_path / "pedidos_fluxo.jsonl"
+    carregador = carregador_fluxo(tmp_path, base)
+
+    log.write_text(linhas_jsonl(hoje.iloc[:600]), encoding="utf-8")
+    carregador.carregar()
+    # Truncado e reescrito com menos bytes: só o conteúdo novo é somado.
+    log.write_text(linhas_jsonl(hoje.iloc[600:]), encoding="utf-8")
+    conferir(carregador.carregar(), esperado(tmp_path, base, hoje))
+
+
+def test_rotacao_le_o_resto_do_arquivo_antigo(tmp_path, pedidos):
+    base, hoje = pedidos
+    log = tmp_path / "pedidos_fluxo.jsonl"
+    carregador = carregador_fluxo(tmp_path, base)
+    filtro = {"regiao": ["Sul"]}
+
+    log.write_text(linhas_jsonl(hoje.iloc[:300]), encoding="utf-8")
+    carregador.carregar()
+    carregador.projetar(filtro)
+    acrescentar(log, linhas_jsonl(hoje.iloc[300:500]))
+    os.rename(log, tmp_path / "pedidos_fluxo.jsonl.1")
+    log.write_text(linhas_jsonl(hoje.iloc[500:]), encoding="utf-8")
+
+    conferir(carregador.carregar(), esperado(tmp_path, base, hoje))
+    conferir(carregador.projetar(filtro), esperado(tmp_path, base, hoje, filtro))
+    assert carregador._seguidor.rotacoes == 1
+
+
+def test_rotacao_apos_linha_parcial(tmp_path, pedidos):
+    base, hoje = pedidos
+    log = tmp_path / "pedidos_fluxo.jsonl"
+    carregador = carregador_fluxo(tmp_path, base)
+
+    # O escritor morreu no meio de uma linha e o arquivo foi rotacionado.
+    log.write_text(
+        linhas_jsonl(hoje.iloc[:300]) + linhas_jsonl(hoje.iloc[300:301])[:25], encoding="utf-8"
+    )
+    carregador.carregar()
+    os.rename(log, tmp_path / "pedidos_fluxo.jsonl.1")
+    log.write_text(linhas_jsonl(hoje.iloc[301:600]), encoding="utf-8")
+    conferir(
+        carregador.carregar(),
+        esperado(tmp_path, base, pd.concat([hoje.iloc[:300], hoje.iloc[301:600]])),
+    )
+
+    acrescentar(log, linhas_jsonl(hoje.iloc[600:]))
+    conferir(
+        carregador.carregar(),
+        esperado(tmp_path, base, pd.concat([hoje.iloc[:300], hoje.iloc[301:]])),
+    )
+    assert carregador._seguidor.rotacoes == 1
+    assert carregador._seguidor.descartadas == 1
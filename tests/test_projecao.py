@@ -0,0 +1,80 @@
+"""Acumulador incremental: o grid tem de ser o mesmo do cálculo vetorizado."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import projecao
+
+SLOT_MINUTOS = 15
+COLUNAS = [c for c in projecao.COLUNAS_GRID if c != "SLOT"]
+
+
+@pytest.fixture
+def referencias():
+    rng = np.random.default_rng(3)
+    s = projecao.n_slots(SLOT_MINUTOS)
+    curvas = {c: rng.gamma(2.0, 50.0, s) for c in ("valor_d1", "valor_d7", "valor_media_mes")}
+    curvas["valor_d1"][:8] = 0   # madrugada sem venda: ritmos NaN
+    curvas["frac_hist"] = np.cumsum(curvas["valor_media_mes"]) / curvas["valor_media_mes"].sum()
+    return curvas
+
+
+@pytest.fixture
+def pedidos():
+    rng = np.random.default_rng(4)
+    slots = np.sort(rng.integers(0, 60, 500))
+    # Um em cada dez pedidos chega atrasado, alguns slots depois do seu.
+    ordem = np.arange(len(slots)) + np.where(rng.random(len(slots)) < 0.1, 15, 0)
+    slots = slots[np.argsort(ordem, kind="stable")]
+    return slots, rng.gamma(2.0, 80.0, len(slots)).round(2)
+
+
+def esperado(referencias, slots, valores, slot_atual):
+    """Grid de `montar_dia` para os mesmos pedidos."""
+    s = projecao.n_slots(SLOT_MINUTOS)
+    curvas = {**referencias, "valor_hoje": np.bincount(slots, weights=valores, minlength=s)}
+    grid, _ = projecao.montar_dia(curvas, pd.Timestamp("2026-03-18"), slot_atual)
+    return grid
+
+
+def conferir(acum, grid):
+    obtido = acum.grid()
+    assert obtido["SLOT"].tolist() == grid["SLOT"].tolist()
+    np.testing.assert_allclose(
+        obtido[COLUNAS].to_numpy(float), grid[COLUNAS].to_numpy(float), rtol=1e-9
+    )
+
+
+def test_adicionar_um_a_um(referencias, pedidos):
+    slots, valores = pedidos
+    acum = projecao.AcumuladorSlots.de_curvas(referencias, SLOT_MINUTOS)
+    for i, (slot, valor) in enumerate(zip(slots, valores)):
+        acum.adicionar(int(slot), float(valor))
+        if i % 50 == 0:
+            conferir(acum, esperado(referencias, slots[: i + 1], valores[: i + 1], acum.slot_atual))
+    conferir(acum, esperado(referencias, slots, valores, acum.slot_atual))
+
+
+def test_adicionar_em_lotes(referencias, pedidos):
+    slots, valores = pedidos
+    acum = projecao.AcumuladorSlots.de_curvas(referencias, SLOT_MINUTOS)
+    for inicio in range(0, len(slots), 70):
+        lote = slice(inicio, inicio + 70)
+        acum.adicionar_lote(slots[lote], valores[lote])
+        fim = inicio + 70
+        conferir(acum, esperado(referencias, slots[:fim], valores[:fim], acum.slot_atual))
+    # Relógio adiantado sem pedidos: o acumulado se repete nos slots vazios.
+    acum.avancar(acum.slot_atual + 5)
+    conferir(acum, esperado(referencias, slots, valores, acum.slot_atual))
+
+
+def test_slots_fora_do_dia(referencias):
+    acum = projecao.AcumuladorSlots.de_curvas(referencias, SLOT_MINUTOS)
+    s = projecao.n_slots(SLOT_MINUTOS)
+    with pytest.raises(ValueError):
+        acum.adicionar_lote([0, s], [1.0, 1.0])
+    with pytest.raises(ValueError):
+        acum.adicionar_lote([-1], [1.0])
+    with pytest.raises(ValueError):
+        acum.adicionar(s, 1.0)
+    assert acum.slot_atual == -1